@@ -0,0 +1,32 @@
+"""add_note_chunks_embedding_hnsw_index
+
+Revision ID: i5c7e0f3b6d8
+Revises: h4b6d9e2a5c7
+Create Date: 2026-01-05 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "i5c7e0f3b6d8"
+down_revision: Union[str, Sequence[str], None] = "h4b6d9e2a5c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Semantic search ranks by inner product, which matches cosine only on unit vectors
+    op.execute("UPDATE note_chunks SET embedding = l2_normalize(embedding)")
+
+    # Create HNSW index for inner product nearest-neighbour search
+    op.execute(
+        "CREATE INDEX ix_note_chunks_embedding_hnsw "
+        "ON note_chunks USING hnsw (embedding vector_ip_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_note_chunks_embedding_hnsw")
@@ -0,0 +1,47 @@
+"""convert_note_chunk_embeddings_to_halfvec
+
+Revision ID: j6d8f1a4c7e9
+Revises: i5c7e0f3b6d8
+Create Date: 2026-01-06 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "j6d8f1a4c7e9"
+down_revision: Union[str, Sequence[str], None] = "i5c7e0f3b6d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The HNSW index is tied to the column's operator class, so rebuild it around the type change
+    op.execute("DROP INDEX IF EXISTS ix_note_chunks_embedding_hnsw")
+
+    # Store embeddings as fp16 (requires pgvector >= 0.7)
+    op.execute(
+        "ALTER TABLE note_chunks "
+        "ALTER COLUMN embedding TYPE halfvec(768) USING embedding::halfvec(768)"
+    )
+
+    op.execute(
+        "CREATE INDEX ix_note_chunks_embedding_hnsw "
+        "ON note_chunks USING hnsw (embedding halfvec_ip_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_note_chunks_embedding_hnsw")
+
+    op.execute(
+        "ALTER TABLE note_chunks "
+        "ALTER COLUMN embedding TYPE vector(768) USING embedding::vector(768)"
+    )
+
+    op.execute(
+        "CREATE INDEX ix_note_chunks_embedding_hnsw "
+        "ON note_chunks USING hnsw (embedding vector_ip_ops)"
+    )
@@ -0,0 +1,38 @@
+"""add_notes_list_and_search_indexes
+
+Revision ID: k7e9a2b5d8f1
+Revises: j6d8f1a4c7e9
+Create Date: 2026-01-07 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "k7e9a2b5d8f1"
+down_revision: Union[str, Sequence[str], None] = "j6d8f1a4c7e9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Covers the default note listing: active notes of a user, newest first
+    op.execute(
+        "CREATE INDEX ix_notes_user_updated_active "
+        "ON notes (user_id, updated_at DESC) WHERE is_archived = false"
+    )
+
+    # Trigram index for free-text ILIKE search; expression must match NOTE_SEARCH_TEXT
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_notes_search_trgm ON notes USING gin ("
+        "(title || ' ' || coalesce(content, '') || ' ' || coalesce(summary, '') "
+        "|| ' ' || coalesce(tags, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notes_search_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_notes_user_updated_active")
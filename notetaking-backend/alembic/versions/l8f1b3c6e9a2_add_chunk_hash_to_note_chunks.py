@@ -0,0 +1,27 @@
+"""add_chunk_hash_to_note_chunks
+
+Revision ID: l8f1b3c6e9a2
+Revises: k7e9a2b5d8f1
+Create Date: 2026-01-08 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "l8f1b3c6e9a2"
+down_revision: Union[str, Sequence[str], None] = "k7e9a2b5d8f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL and are simply re-embedded the next time their note changes
+    op.add_column("note_chunks", sa.Column("chunk_hash", sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("note_chunks", "chunk_hash")
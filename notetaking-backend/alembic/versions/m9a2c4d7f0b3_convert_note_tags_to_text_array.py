@@ -0,0 +1,57 @@
+"""convert_note_tags_to_text_array
+
+Revision ID: m9a2c4d7f0b3
+Revises: l8f1b3c6e9a2
+Create Date: 2026-01-09 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision: str = "m9a2c4d7f0b3"
+down_revision: Union[str, Sequence[str], None] = "l8f1b3c6e9a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The trigram index covers tags as text; rebuild it without them
+    op.execute("DROP INDEX IF EXISTS ix_notes_search_trgm")
+
+    # Backfill a text array from the comma-separated string
+    op.add_column("notes", sa.Column("tags_array", ARRAY(sa.Text()), nullable=True))
+    op.execute(
+        "UPDATE notes SET tags_array = ARRAY("
+        "SELECT btrim(tag) FROM unnest(string_to_array(tags, ',')) AS tag "
+        "WHERE btrim(tag) <> '') "
+        "WHERE tags IS NOT NULL"
+    )
+    op.drop_column("notes", "tags")
+    op.alter_column("notes", "tags_array", new_column_name="tags")
+
+    op.execute("CREATE INDEX ix_notes_tags_gin ON notes USING gin (tags)")
+    op.execute(
+        "CREATE INDEX ix_notes_search_trgm ON notes USING gin ("
+        "(title || ' ' || coalesce(content, '') || ' ' || coalesce(summary, '')) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notes_search_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_notes_tags_gin")
+
+    op.add_column("notes", sa.Column("tags_string", sa.String(length=500), nullable=True))
+    op.execute("UPDATE notes SET tags_string = array_to_string(tags, ',') WHERE tags IS NOT NULL")
+    op.drop_column("notes", "tags")
+    op.alter_column("notes", "tags_string", new_column_name="tags")
+
+    op.execute(
+        "CREATE INDEX ix_notes_search_trgm ON notes USING gin ("
+        "(title || ' ' || coalesce(content, '') || ' ' || coalesce(summary, '') "
+        "|| ' ' || coalesce(tags, '')) gin_trgm_ops)"
+    )
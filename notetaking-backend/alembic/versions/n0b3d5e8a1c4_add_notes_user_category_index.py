@@ -0,0 +1,29 @@
+"""add_notes_user_category_index
+
+Revision ID: n0b3d5e8a1c4
+Revises: m9a2c4d7f0b3
+Create Date: 2026-01-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "n0b3d5e8a1c4"
+down_revision: Union[str, Sequence[str], None] = "m9a2c4d7f0b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets DISTINCT category per user be answered from the index
+    op.execute(
+        "CREATE INDEX ix_notes_user_category "
+        "ON notes (user_id, category) WHERE category IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notes_user_category")
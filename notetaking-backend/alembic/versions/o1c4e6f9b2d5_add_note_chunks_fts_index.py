@@ -0,0 +1,29 @@
+"""add_note_chunks_fts_index
+
+Revision ID: o1c4e6f9b2d5
+Revises: n0b3d5e8a1c4
+Create Date: 2026-01-11 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "o1c4e6f9b2d5"
+down_revision: Union[str, Sequence[str], None] = "n0b3d5e8a1c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Full-text keyword filter for RAG chunk search (to_tsvector('simple', chunk_text) @@ plainto_tsquery)
+    op.execute(
+        "CREATE INDEX ix_note_chunks_chunk_text_fts "
+        "ON note_chunks USING gin (to_tsvector('simple', chunk_text))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_note_chunks_chunk_text_fts")
@@ -0,0 +1,41 @@
+"""add_notifications_inbox_indexes
+
+Revision ID: p2d5f7a0c3e6
+Revises: o1c4e6f9b2d5
+Create Date: 2026-01-12 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "p2d5f7a0c3e6"
+down_revision: Union[str, Sequence[str], None] = "o1c4e6f9b2d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Inbox page filtered by read state: WHERE user_id, is_read ORDER BY created_at DESC LIMIT
+    op.execute(
+        "CREATE INDEX ix_notifications_user_read_created "
+        "ON notifications (user_id, is_read, created_at DESC)"
+    )
+    # Unfiltered inbox page: WHERE user_id ORDER BY created_at DESC LIMIT
+    op.execute(
+        "CREATE INDEX ix_notifications_user_created "
+        "ON notifications (user_id, created_at DESC)"
+    )
+    # Unread badge count as an index-only scan
+    op.execute(
+        "CREATE INDEX ix_notifications_user_unread "
+        "ON notifications (user_id) WHERE is_read = false"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_unread")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_created")
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_read_created")
@@ -0,0 +1,43 @@
+"""convert_task_job_result_to_jsonb
+
+Revision ID: q3e6a8b1d4f7
+Revises: p2d5f7a0c3e6
+Create Date: 2026-01-13 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "q3e6a8b1d4f7"
+down_revision: Union[str, Sequence[str], None] = "p2d5f7a0c3e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Results were JSON text or a raw transcript; keep the latter as a JSON string
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.task_job_result_to_jsonb(value text) RETURNS jsonb AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(value);
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "ALTER TABLE task_jobs ALTER COLUMN result TYPE jsonb "
+        "USING pg_temp.task_job_result_to_jsonb(result)"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "ALTER TABLE task_jobs ALTER COLUMN result TYPE text "
+        "USING CASE WHEN jsonb_typeof(result) = 'string' THEN result #>> '{}' ELSE result::text END"
+    )
@@ -0,0 +1,38 @@
+"""add_task_jobs_search_vector
+
+Revision ID: r4f7b9c2e5a8
+Revises: q3e6a8b1d4f7
+Create Date: 2026-01-14 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "r4f7b9c2e5a8"
+down_revision: Union[str, Sequence[str], None] = "q3e6a8b1d4f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE task_jobs ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', "
+        "coalesce(task_type, '') || ' ' || coalesce(status, '') || ' ' || id)) STORED"
+    )
+    op.execute(
+        "CREATE INDEX ix_task_jobs_search_vector ON task_jobs USING gin (search_vector)"
+    )
+    # Anchored prefix search on job ids (LIKE 'abc%') regardless of the database collation
+    op.execute(
+        "CREATE INDEX ix_task_jobs_id_pattern ON task_jobs (id varchar_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_task_jobs_id_pattern")
+    op.execute("DROP INDEX IF EXISTS ix_task_jobs_search_vector")
+    op.execute("ALTER TABLE task_jobs DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,31 @@
+"""add_notifications_dedup_key
+
+Revision ID: s5a8c0d3f6b9
+Revises: r4f7b9c2e5a8
+Create Date: 2026-01-15 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "s5a8c0d3f6b9"
+down_revision: Union[str, Sequence[str], None] = "r4f7b9c2e5a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE notifications ADD COLUMN dedup_key varchar(64)")
+    # Existing rows keep NULL, which never conflicts
+    op.execute(
+        "CREATE UNIQUE INDEX uq_notifications_user_dedup_key "
+        "ON notifications (user_id, dedup_key)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_notifications_user_dedup_key")
+    op.execute("ALTER TABLE notifications DROP COLUMN IF EXISTS dedup_key")
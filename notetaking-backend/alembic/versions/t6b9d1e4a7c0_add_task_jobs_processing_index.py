@@ -0,0 +1,29 @@
+"""add_task_jobs_processing_index
+
+Revision ID: t6b9d1e4a7c0
+Revises: s5a8c0d3f6b9
+Create Date: 2026-01-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "t6b9d1e4a7c0"
+down_revision: Union[str, Sequence[str], None] = "s5a8c0d3f6b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stuck-job cleanup; "processing" is short-lived, so the partial index stays tiny
+    op.execute(
+        "CREATE INDEX ix_task_jobs_processing_updated "
+        "ON task_jobs (updated_at) WHERE status = 'processing'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_task_jobs_processing_updated")
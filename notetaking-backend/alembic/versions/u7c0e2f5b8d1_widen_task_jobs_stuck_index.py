@@ -0,0 +1,35 @@
+"""widen_task_jobs_stuck_index
+
+Revision ID: u7c0e2f5b8d1
+Revises: t6b9d1e4a7c0
+Create Date: 2026-01-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "u7c0e2f5b8d1"
+down_revision: Union[str, Sequence[str], None] = "t6b9d1e4a7c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stuck-job cleanup now also fails stale "queued" rows; active rows are few, so the
+    # partial index stays small
+    op.execute(
+        "CREATE INDEX ix_task_jobs_active_updated "
+        "ON task_jobs (updated_at) WHERE status IN ('pending', 'queued', 'processing')"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_task_jobs_processing_updated")
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX ix_task_jobs_processing_updated "
+        "ON task_jobs (updated_at) WHERE status = 'processing'"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_task_jobs_active_updated")
@@ -10,6 +10,7 @@ from app.schemas.audio import AudioFile as AudioFileSchema, AudioFileUpdate, Aud
 from app.schemas.pagination import ResponseCommon as ResponseCommonSchema, PageDto
 from app.common.pagination_utils import PaginationHelper
 from app.common.common_message import CommonMessage
+from app.common.constants import CacheKeys
 from app.common.response_common import ResponseCommon
 from app.services.audio_service import audio_service
 from app.services.task_job_service import task_job_service
@@ -156,6 +157,7 @@ async def upload_audio_file_async(
             task_function="handle_audio_upload",
             user_id=current_user.id,
             audio_id=audio_file.id,
+            batch_queue=CacheKeys.PENDING_AUDIO_UPLOADS,
             file_info=file_info,
         )
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
+from typing import Optional
 import json
 
 from app.api.deps import get_db, get_current_active_user
@@ -188,6 +189,7 @@ async def get_folder_audio_files(
     folder_id: int,
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
@@ -195,13 +197,18 @@ async def get_folder_audio_files(
     Get all audio files in a specific folder.
     
     Returns paginated list of audio files.
+
+    - **fields**: Comma-separated heavy fields to include (e.g. `transcription`)
     """
+    requested_fields = {field.strip() for field in (fields or "").split(",") if field.strip()}
+
     response = folder_service.get_folder_audio_files(
         db=db,
         folder_id=folder_id,
         user_id=current_user.id,
         skip=skip,
-        limit=limit
+        limit=limit,
+        include_transcription="transcription" in requested_fields
     )
     
     return Response(
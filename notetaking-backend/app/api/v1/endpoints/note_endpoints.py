@@ -63,6 +63,7 @@ async def search_notes(
     - **from_date**: Filter notes created after date
     - **to_date**: Filter notes created before date
     - **audio_file_id**: Filter by linked audio file
+    - **list_view**: Omit content, summary and transcript excerpt (for list screens)
     """
     paginated_notes = search_notes_service(
         db=db,
@@ -268,7 +269,7 @@ async def summarize_transcript(
         Summary HTML and the created note ID
     """
     
-    result = summarize_audio_transcript(
+    result = await summarize_audio_transcript(
         db=db,
         audio_file_id=request.audio_file_id,
         user_id=current_user.id
@@ -302,6 +303,7 @@ async def summarize_transcript_async(
         task_function="handle_summarization",
         user_id=current_user.id,
         audio_id=summarize_request.audio_file_id,
+        dedup_key=f"summarize:{current_user.id}:{summarize_request.audio_file_id}",
     )
 
     return result.to_json()
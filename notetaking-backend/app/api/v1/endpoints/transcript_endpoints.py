@@ -88,7 +88,7 @@ async def transcribe_audio(
         db.commit()
         
         # Perform transcription
-        transcription_response = transcript_service.transcribe_audio(
+        transcription_response = await transcript_service.atranscribe_audio(
             audio_file=audio_file,
             language_code=request.language_code
         )
@@ -211,6 +211,7 @@ async def transcribe_audio_async(
         user_id=current_user.id,
         audio_id=transcript_request.audio_id,
         language_code=transcript_request.language_code,
+        dedup_key=f"transcribe:{current_user.id}:{transcript_request.audio_id}",
     )
 
     return result.to_json()
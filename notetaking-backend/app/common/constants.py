@@ -278,6 +278,14 @@ class CacheKeys:
     TRANSCRIPTION = "transcription:{audio_id}"
     NOTE = "note:{note_id}"
     USER_NOTES = "user:notes:{user_id}"
+    FOLDERS_DROPDOWN = "folders:dropdown:{user_id}"  # Hash of sort order -> PageDto JSON
+    QUERY_EMBEDDING = "embedding:query:{digest}"  # sha256 of embedding model + query
+    NOTE_SUMMARY = "note:summary:{digest}"  # sha256 of summary model + prompts
+    NOTE_CATEGORIES = "notes:categories:{user_id}"  # JSON list of distinct categories
+    NOTIFICATION_DEDUP = "notif:dedup:{user_id}:{digest}"  # md5 of notification type, related id, text and run id
+    TASK_JOB_STATUS = "task:status:{job_id}"  # In-flight status hash written by the worker
+    PENDING_AUDIO_UPLOADS = "task:pending:audio_upload"  # List of upload jobs the worker completes in batches
+    PROCESSING_AUDIO_UPLOADS = "task:processing:audio_upload:{worker_id}"  # Uploads a worker has claimed but not committed
     
     # Cache TTL (in seconds)
     DEFAULT_TTL = 3600  # 1 hour
@@ -292,6 +300,7 @@ class PaginationDefaults:
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
     MIN_PAGE_SIZE = 1
+    MAX_DROPDOWN_ITEMS = 500  # Upper bound for is_dropdown (unpaginated) responses
 
 class Common:
     # Embedding model configuration
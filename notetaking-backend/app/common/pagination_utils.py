@@ -97,6 +97,9 @@ class PaginationHelper:
         item_dict = None
         if hasattr(item, "__table__") and hasattr(item.__table__, "columns"):
             item_dict = {column.key: getattr(item, column.key) for column in item.__table__.columns}
+        elif hasattr(item, "_asdict"):
+            # Column-projected query rows
+            item_dict = item._asdict()
         else:
             try:
                 item_dict = dict(item)
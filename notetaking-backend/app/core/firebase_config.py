@@ -1,11 +1,39 @@
+import logging
 import os
+from functools import lru_cache
 
 import firebase_admin
-from firebase_admin import credentials
+from firebase_admin import credentials, messaging
+from requests.adapters import HTTPAdapter
 
+logger = logging.getLogger(__name__)
 
+# Keep-alive connections to fcm.googleapis.com; send_each posts every message of a batch
+# from its own thread, while requests keeps only 10 connections per host by default
+FCM_HTTP_POOL_SIZE = int(os.getenv("FCM_HTTP_POOL_SIZE", "50"))
+
+
+def _size_fcm_pool(app) -> None:
+    """Best effort: enlarge the pool of the SDK's HTTP session, leaving the default one otherwise."""
+    # firebase-admin has no public hook for this; the private attribute path may change
+    # between releases, in which case sends keep working on the default pool
+    try:
+        session = getattr(getattr(messaging._get_messaging_service(app), "_client", None), "session", None)
+        if session is None or not callable(getattr(session, "mount", None)):
+            logger.warning("Could not size the FCM connection pool: unsupported firebase-admin internals")
+            return
+        retries = session.get_adapter("https://").max_retries
+        session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=FCM_HTTP_POOL_SIZE, max_retries=retries),
+        )
+    except Exception as e:
+        logger.warning("Could not size the FCM connection pool: %s", str(e))
+
+
+@lru_cache(maxsize=1)
 def init_firebase():
-    """Initialize Firebase Admin SDK with service account credentials."""
+    """Initialize Firebase Admin SDK with service account credentials (once per process)."""
     if firebase_admin._apps:
         return firebase_admin.get_app()
 
@@ -14,5 +42,14 @@ def init_firebase():
         raise FileNotFoundError(f"Firebase credentials not found at {cred_path}")
 
     cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
-    return firebase_admin.get_app()
+    app = firebase_admin.initialize_app(cred)
+    _size_fcm_pool(app)
+    return app
+
+
+def warm_firebase_token() -> None:
+    """Fetch the OAuth2 access token up front so the first push doesn't pay for it."""
+    try:
+        init_firebase().credential.get_access_token()
+    except Exception as e:
+        logger.warning("Failed to pre-fetch Firebase access token: %s", str(e))
@@ -0,0 +1,206 @@
+"""
+Shared Vertex AI GenAI client with client-side rate limiting and retry on quota errors.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, TypeVar
+
+from google import genai
+try:
+    from google.genai.errors import ClientError
+except ImportError:  # pragma: no cover - optional dependency guard
+    ClientError = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def get_int_env(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Invalid %s=%s, using default %d", name, value, default)
+        return default
+
+
+def get_float_env(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning("Invalid %s=%s, using default %.2f", name, value, default)
+        return default
+
+
+# Initialize the GenAI client for Vertex AI
+client = genai.Client(
+    vertexai=True,
+    project=os.getenv('GOOGLE_CLOUD_PROJECT'),
+    location=os.getenv('GOOGLE_CLOUD_LOCATION')
+)
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter on requests per minute and per second (0 = disabled)."""
+
+    def __init__(self, name: str, per_min: int = 0, per_sec: int = 0):
+        self.name = name
+        self.per_min = per_min
+        self.per_sec = per_sec
+        self._lock = threading.Lock()
+        self._window_min = deque()
+        self._window_sec = deque()
+
+    @staticmethod
+    def _trim(window: deque, now: float, window_seconds: float) -> None:
+        while window and now - window[0] > window_seconds:
+            window.popleft()
+
+    def _wait(self, window: deque, limit: int, now: float, window_seconds: float, label: str) -> float:
+        self._trim(window, now, window_seconds)
+        if len(window) >= limit:
+            sleep_time = window_seconds - (now - window[0])
+            if sleep_time > 0:
+                logger.info(
+                    "%s rate limit hit (%s=%d). Sleeping %.2fs",
+                    self.name,
+                    label,
+                    limit,
+                    sleep_time,
+                )
+                time.sleep(sleep_time)
+                now = time.monotonic()
+                self._trim(window, now, window_seconds)
+        return now
+
+    def acquire(self) -> None:
+        if self.per_min <= 0 and self.per_sec <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if self.per_min > 0:
+                now = self._wait(self._window_min, self.per_min, now, 60.0, "per_min")
+            if self.per_sec > 0:
+                now = self._wait(self._window_sec, self.per_sec, now, 1.0, "per_sec")
+
+            if self.per_min > 0:
+                self._window_min.append(now)
+            if self.per_sec > 0:
+                self._window_sec.append(now)
+
+
+def is_retryable_error(exc: Exception) -> bool:
+    """Quota / rate-limit errors (HTTP 429, RESOURCE_EXHAUSTED) are worth retrying."""
+    if ClientError and isinstance(exc, ClientError):
+        status_code = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        if status_code == 429:
+            return True
+    text = str(exc).lower()
+    return "429" in text or "resource_exhausted" in text or "quota" in text
+
+
+def get_backoff_seconds(attempt: int, base_seconds: float, max_seconds: float, jitter_seconds: float) -> float:
+    backoff = min(max_seconds, base_seconds * (2 ** attempt))
+    if jitter_seconds > 0:
+        backoff += random.uniform(0.0, jitter_seconds)
+    return backoff
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    *,
+    limiter: RateLimiter,
+    max_retries: int,
+    backoff_base_seconds: float,
+    backoff_max_seconds: float,
+    backoff_jitter_seconds: float,
+    concurrency: Optional[threading.BoundedSemaphore] = None,
+) -> T:
+    """
+    Run a blocking GenAI call under the limiter, retrying retryable errors with
+    exponential backoff plus jitter. Non-retryable errors propagate immediately.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            limiter.acquire()
+            if concurrency is None:
+                return func()
+            with concurrency:
+                return func()
+        except Exception as exc:
+            if not is_retryable_error(exc) or attempt >= max_retries:
+                raise
+            sleep_time = get_backoff_seconds(
+                attempt, backoff_base_seconds, backoff_max_seconds, backoff_jitter_seconds
+            )
+            logger.warning(
+                "%s request failed with retryable error: %s. Retrying in %.2fs (attempt %d/%d)",
+                limiter.name,
+                exc,
+                sleep_time,
+                attempt + 1,
+                max_retries,
+            )
+            time.sleep(sleep_time)
+
+
+# Text generation (summaries) limits
+_GEMINI_MAX_CONCURRENCY = max(1, get_int_env("GEMINI_MAX_CONCURRENCY", 2))
+_GEMINI_MAX_RETRIES = max(0, get_int_env("GEMINI_MAX_RETRIES", 5))
+_GEMINI_BACKOFF_BASE_SECONDS = max(0.0, get_float_env("GEMINI_BACKOFF_BASE_SECONDS", 1.0))
+_GEMINI_BACKOFF_MAX_SECONDS = max(0.0, get_float_env("GEMINI_BACKOFF_MAX_SECONDS", 60.0))
+_GEMINI_BACKOFF_JITTER_SECONDS = max(0.0, get_float_env("GEMINI_BACKOFF_JITTER_SECONDS", 1.0))
+
+_generate_limiter = RateLimiter(
+    "Gemini",
+    per_min=max(0, get_int_env("GEMINI_RATE_LIMIT_PER_MIN", 0)),
+    per_sec=max(0, get_int_env("GEMINI_RATE_LIMIT_PER_SEC", 0)),
+)
+_generate_concurrency = threading.BoundedSemaphore(_GEMINI_MAX_CONCURRENCY)
+
+
+def generate_content(**kwargs):
+    """Blocking client.models.generate_content with rate limiting and retry on 429."""
+    return call_with_retry(
+        lambda: client.models.generate_content(**kwargs),
+        limiter=_generate_limiter,
+        max_retries=_GEMINI_MAX_RETRIES,
+        backoff_base_seconds=_GEMINI_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=_GEMINI_BACKOFF_MAX_SECONDS,
+        backoff_jitter_seconds=_GEMINI_BACKOFF_JITTER_SECONDS,
+        concurrency=_generate_concurrency,
+    )
+
+
+def generate_content_stream_text(**kwargs) -> str:
+    """
+    Streaming client.models.generate_content_stream, returning the concatenated text.
+    A retry restarts the stream from scratch.
+    """
+    def _collect() -> str:
+        parts = []
+        for chunk in client.models.generate_content_stream(**kwargs):
+            if chunk.text:
+                parts.append(chunk.text)
+        return "".join(parts)
+
+    return call_with_retry(
+        _collect,
+        limiter=_generate_limiter,
+        max_retries=_GEMINI_MAX_RETRIES,
+        backoff_base_seconds=_GEMINI_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=_GEMINI_BACKOFF_MAX_SECONDS,
+        backoff_jitter_seconds=_GEMINI_BACKOFF_JITTER_SECONDS,
+        concurrency=_generate_concurrency,
+    )
@@ -1,4 +1,5 @@
 import os
+import redis
 from arq.connections import RedisSettings
 
 
@@ -12,3 +13,12 @@ def get_redis_settings() -> RedisSettings:
 
 
 REDIS_SETTINGS = get_redis_settings()
+
+
+# Shared synchronous client for request-path caching (connections are pooled lazily)
+REDIS_CLIENT = redis.Redis(
+    host=REDIS_SETTINGS.host,
+    port=REDIS_SETTINGS.port,
+    db=REDIS_SETTINGS.database,
+    decode_responses=True,
+)
@@ -1,3 +1,6 @@
+import json
+from functools import partial
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -18,7 +21,50 @@ if not DATABASE_URL:
     
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{encoded_password}@{DB_HOST}:5432/{POSTGRES_DB}"
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    pool_pre_ping=True,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Separate small pool for Socket.IO connect/join lookups: a reconnect storm can't starve
+# the API pool, and sockets fail fast instead of queueing behind long requests
+socket_engine = create_engine(
+    DATABASE_URL,
+    pool_size=int(os.getenv("SOCKET_DB_POOL_SIZE", "5")),
+    max_overflow=0,
+    pool_timeout=int(os.getenv("SOCKET_DB_POOL_TIMEOUT", "5")),
+    pool_pre_ping=True,
+)
+SocketSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=socket_engine)
+
+# ARQ worker pool: sized to the worker's max_jobs so no job waits for a connection, and
+# recycled so connections held by a long-lived worker don't outlive server-side timeouts.
+# Objects stay loaded after commit; the worker would otherwise re-SELECT them to read fields
+worker_engine = create_engine(
+    DATABASE_URL,
+    pool_size=int(os.getenv("WORKER_DB_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("WORKER_DB_MAX_OVERFLOW", "5")),
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    # LIFO reuse keeps a few hot connections busy and lets the rest idle out to recycle
+    pool_use_lifo=True,
+    connect_args={
+        # Job queries are short primary-key lookups/updates; JIT compile time never pays off
+        "options": "-c jit=off",
+        # TCP keepalives surface connections dropped by an idle-killing firewall
+        "keepalives": 1,
+        "keepalives_idle": 300,
+    },
+    # Job results (JSONB) are mostly Vietnamese text: sent unescaped it is 2-3 bytes per
+    # character on the wire instead of a 6-byte \uXXXX escape
+    json_serializer=partial(json.dumps, ensure_ascii=False),
+)
+WorkerSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=worker_engine
+)
+
 Base = declarative_base()
\ No newline at end of file
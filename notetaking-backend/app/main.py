@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+import asyncio
 import time
 import logging
 import os
@@ -11,7 +12,7 @@ from arq import create_pool
 from app.core.redis_config import REDIS_SETTINGS
 from app.socket_manager import sio
 import socketio
-from app.core.firebase_config import init_firebase
+from app.core.firebase_config import init_firebase, warm_firebase_token
 
 load_dotenv()  # Load environment variables from .env file
 
@@ -42,6 +43,7 @@ async def startup_event():
     from app.models import User, AudioFile, TaskJob, ChatbotSession, ChatbotMessage
 
     init_firebase()
+    await asyncio.to_thread(warm_firebase_token)
 
     max_retries = 5
     retry_delay = 2
@@ -1,5 +1,5 @@
 from app.models.base_import import Base, Column, Integer, String, DateTime, datetime, timezone, Text, ForeignKey, relationship
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 
 class NoteChunk(Base):
     """
@@ -15,9 +15,10 @@ class NoteChunk(Base):
     chunk_text = Column(Text, nullable=False)
     chunk_index = Column(Integer, nullable=False)  # Order of chunk in original text
     chunk_type = Column(String(20), nullable=False, default="content")  # "content" or "summary"
+    chunk_hash = Column(String(32), nullable=True)  # blake2b of chunk_text, for embedding reuse
     
     # Vector embedding for the chunk
-    embedding = Column(Vector(768), nullable=False)  # 768 dimensions for text-embedding-005
+    embedding = Column(HALFVEC(768), nullable=False)  # 768 dimensions for text-embedding-005, stored as fp16
     
     # Metadata for context
     start_char = Column(Integer, nullable=True)  # Starting character position in original text
@@ -1,5 +1,7 @@
 from app.models.base_import import Base, Column, Integer, String, Boolean, DateTime, datetime, timezone, Text, Float, ForeignKey, relationship
 from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import validates
 
 class Note(Base):
     __tablename__ = "notes"
@@ -21,7 +23,7 @@ class Note(Base):
     is_favorite = Column(Boolean, default=False)
     is_archived = Column(Boolean, default=False)
     color = Column(String(7), default="#FFFFFF")      # Hex color for UI
-    tags = Column(String(500), nullable=True)         # JSON array of tags
+    tags = Column(ARRAY(Text), nullable=True)         # GIN-indexed; API exposes a comma-separated string
     
     # Audio-related fields
     audio_timestamp = Column(Float, nullable=True)    # Link to specific audio moment
@@ -42,4 +44,11 @@ class Note(Base):
     # Relationships
     user = relationship("User", back_populates="notes")
     audio_file = relationship("AudioFile", back_populates="notes")
-    chunks = relationship("NoteChunk", back_populates="note", cascade="all, delete-orphan")
\ No newline at end of file
+    chunks = relationship("NoteChunk", back_populates="note", cascade="all, delete-orphan")
+
+    @validates("tags")
+    def validate_tags(self, key, value):
+        """Accept the API's comma-separated string and store it as a text array."""
+        if isinstance(value, str):
+            return [tag.strip() for tag in value.split(",") if tag.strip()] or None
+        return value
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index
 from sqlalchemy.sql import func
 
 from app.models.base_import import (
@@ -16,6 +16,10 @@ from app.models.base_import import (
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Target of INSERT ... ON CONFLICT DO NOTHING in NotificationService
+        Index("uq_notifications_user_dedup_key", "user_id", "dedup_key", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -24,6 +28,7 @@ class Notification(Base):
     notification_type = Column(String(50), nullable=False)  # audio_processed, note_created, task_completed, etc.
     related_id = Column(Integer, nullable=True)  # ID of related entity (audio_id, note_id, etc.)
     data = Column(JSON, nullable=True)  # Additional metadata
+    dedup_key = Column(String(64), nullable=True)  # Payload hash + dedup window; NULL when dedup is disabled
     is_read = Column(Boolean, default=False, nullable=False, index=True)
     read_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
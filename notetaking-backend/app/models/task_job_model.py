@@ -1,4 +1,5 @@
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Computed, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 
 from app.models.base_import import (
     Base,
@@ -16,15 +17,31 @@ from app.models.base_import import (
 
 class TaskJob(Base):
     __tablename__ = "task_jobs"
+    __table_args__ = (
+        # Lets stuck-job cleanup (TaskJobService.fail_stuck_jobs) skip the job history
+        Index(
+            "ix_task_jobs_active_updated",
+            "updated_at",
+            postgresql_where=text("status IN ('pending', 'queued', 'processing')"),
+        ),
+    )
 
     id = Column(String, primary_key=True, index=True)
     task_type = Column(String, nullable=False, index=True)
     status = Column(String, default="pending", index=True)
-    result = Column(Text, nullable=True)
+    result = Column(JSONB, nullable=True)  # Handler output; plain transcripts are stored as JSON strings
     error_message = Column(Text, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     audio_id = Column(Integer, ForeignKey("audio_files.id", ondelete="CASCADE"), nullable=True)
     metadata_json = Column("metadata", JSON, nullable=True)
+    # GIN-indexed full-text search over task type, status and id (see search_tasks)
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(task_type, '') || ' ' || coalesce(status, '') || ' ' || id)",
+            persisted=True,
+        ),
+    )
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime,
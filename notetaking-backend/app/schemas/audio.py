@@ -74,6 +74,20 @@ class AudioFile(AudioFileBase):
         from_attributes = True
 
 
+class AudioFileListItem(AudioFileBase):
+    """Lightweight audio file schema for list views (omits the transcription text)"""
+    id: int
+    user_id: int
+    file_path: str
+    status: str
+    confidence_score: Optional[float] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class AudioSearchDto(PageOptionsDto):
     """
     Audio files search/filter request payload.
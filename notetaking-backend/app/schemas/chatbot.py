@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 from datetime import datetime
 
 
@@ -49,3 +49,24 @@ class ChatbotMessageHistoryResponse(BaseModel):
     total: int
     limit: int
     offset: int
+
+
+class IntentDateRange(BaseModel):
+    start: Optional[str] = None
+    end: Optional[str] = None
+
+
+class IntentEntities(BaseModel):
+    date_range: Optional[IntentDateRange] = None
+    keywords: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    audio_ids: Optional[List[int]] = None
+    actions: Optional[List[str]] = None
+    person_names: Optional[List[str]] = None
+
+
+class IntentResponse(BaseModel):
+    """Structured output schema enforced on the intent classifier."""
+    intent: Literal["search", "summarize", "question", "manage", "analytics", "chat"]
+    confidence: float = Field(..., ge=0.0, le=1.0)
+    entities: IntentEntities = Field(default_factory=IntentEntities)
@@ -8,7 +8,18 @@ logger = logging.getLogger(__name__)
 
 from app.schemas.pagination import PageOptionsDto
 
-class NoteBase(BaseModel):
+class NoteTagsMixin(BaseModel):
+    """Exposes the tags text array as a comma-separated string"""
+
+    @field_validator("tags", mode="before", check_fields=False)
+    @classmethod
+    def join_tags(cls, v):
+        # Tags are stored as a text array but exposed as a comma-separated string
+        if isinstance(v, (list, tuple)):
+            return ",".join(v)
+        return v
+
+class NoteBase(NoteTagsMixin):
     title: str
     content: Optional[str] = None
     summary: Optional[Any] = None
@@ -62,6 +73,26 @@ class Note(NoteBase):
     class Config:
         from_attributes = True
 
+class NoteListItem(NoteTagsMixin):
+    """Lightweight note schema for list views (omits content, summary and transcript excerpt)"""
+    id: int
+    user_id: int
+    audio_file_id: Optional[int] = None
+    title: str
+    category: Optional[str] = "general"
+    priority: Optional[str] = "normal"
+    is_favorite: Optional[bool] = False
+    is_archived: bool
+    color: Optional[str] = "#FFFFFF"
+    tags: Optional[str] = None
+    audio_timestamp: Optional[float] = None
+    is_shared: Optional[bool] = False
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class NoteWithAudio(Note):
     audio_file: Optional[dict] = None  # AudioFile info if linked
 
@@ -77,10 +108,11 @@ class NoteSearchDto(PageOptionsDto):
     is_favorite: Optional[bool] = Field(default=None, description="Filter favorite notes")
     is_archived: Optional[bool] = Field(default=None, description="Filter archived notes")
     is_shared: Optional[bool] = Field(default=None, description="Filter shared notes")
-    tags: Optional[str] = Field(default=None, description="Filter by tags (comma-separated)")
+    tags: Optional[str] = Field(default=None, description="Filter by tags (comma-separated, notes must have all of them)")
     from_date: Optional[datetime] = Field(default=None, description="Filter notes created after this date")
     to_date: Optional[datetime] = Field(default=None, description="Filter notes created before this date")
     audio_file_id: Optional[int] = Field(default=None, description="Filter by linked audio file")
+    list_view: bool = Field(default=False, description="If true, omit content, summary and transcript excerpt")
 
     class Config:
         json_schema_extra = {
@@ -150,6 +182,9 @@ class SemanticSearchRequest(BaseModel):
 class NoteWithSimilarity(BaseModel):
     note: Note
     similarity_score: float
+    snippet: Optional[str] = None  # Text of the best-matching chunk
+    chunk_type: Optional[str] = None  # "content" or "summary": which text the range points into
+    range: Optional[List[Optional[int]]] = None  # [start_char, end_char] of the snippet
 
 
 class SemanticSearchResponse(BaseModel):
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+import json
+
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Any
 from datetime import datetime
 
@@ -16,6 +18,14 @@ class TaskJobResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    @field_validator("result", mode="before")
+    @classmethod
+    def dump_result(cls, v):
+        # Results are stored as JSONB but the task list has always exposed them as JSON text
+        if v is None or isinstance(v, str):
+            return v
+        return json.dumps(v, ensure_ascii=False)
+
     class Config:
         from_attributes = True
         populate_by_name = True
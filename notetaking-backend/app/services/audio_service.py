@@ -14,6 +14,7 @@ from app.common.pagination_utils import PaginationHelper
 from app.common.common_message import CommonMessage
 from app.common.response_common import ResponseCommon
 from app.schemas.pagination import PageDto, PageMetaDto
+from app.services.folder_service import folder_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -161,6 +162,8 @@ class AudioService:
             db.add(audio_file)
             db.commit()
             db.refresh(audio_file)
+            if audio_file.folder_id is not None:
+                folder_service.invalidate_dropdown_cache(user.id)
         except Exception:
             db.rollback()
             return ResponseCommon.error_response(
@@ -258,6 +261,9 @@ class AudioService:
             else:
                 db.commit()
 
+            if "folder_id" in changes:
+                folder_service.invalidate_dropdown_cache(user_id)
+
             note_exists = db.query(Note.id).filter(
                 Note.audio_file_id == audio_file.id
             ).first() is not None
@@ -441,8 +447,11 @@ class AudioService:
                 os.remove(audio_file.file_path)
 
             # Delete from database
+            folder_id = audio_file.folder_id
             db.delete(audio_file)
             db.commit()
+            if folder_id is not None:
+                folder_service.invalidate_dropdown_cache(user_id)
             return ResponseCommon.success_response(
                 message=CommonMessage.AUDIO_DELETED_SUCCESS
             )
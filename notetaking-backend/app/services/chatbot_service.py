@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 import uuid
@@ -37,10 +38,11 @@ class ChatbotService:
         start_time = time.time()
 
         try:
-            session = self._get_session(db, user_id, session_id)
-            history = self._get_conversation_history(db, session_id)
+            # DB and blocking Gemini/embedding calls run in threads so concurrent messages
+            # (worker max_jobs, socket handlers) aren't serialized on the event loop
+            session, history = await asyncio.to_thread(self._load_session, db, user_id, session_id)
 
-            intent_result = intent_service.classify_intent(message, history)
+            intent_result = await intent_service.classify_intent(message, history)
             intent = intent_result.get("intent", "chat")
             if intent not in {"search", "summarize", "question", "manage", "analytics", "chat"}:
                 intent = "chat"
@@ -59,25 +61,17 @@ class ChatbotService:
             context = ""
 
             if intent in ["search", "summarize", "question", "analytics"]:
-                chunks = rag_context_service.semantic_search_with_filters(
-                    db, user_id, message, entities
+                chunks = await asyncio.to_thread(
+                    rag_context_service.semantic_search_with_filters,
+                    db, user_id, message, entities,
                 )
                 audio_files = rag_context_service.get_related_audio_files(chunks)
                 notes = rag_context_service.get_related_notes(chunks)
                 context = rag_context_service.build_context(chunks)
 
-            if intent == "search":
-                result = self._handle_search(audio_files, notes)
-            elif intent == "summarize":
-                result = self._handle_summarization(context, message)
-            elif intent == "question":
-                result = self._handle_question(context, message)
-            elif intent == "manage":
-                result = self._handle_management(entities)
-            elif intent == "analytics":
-                result = self._handle_analytics(context, message)
-            else:
-                result = self._handle_chat(message)
+            result = await asyncio.to_thread(
+                self._handle_intent, intent, message, entities, context, audio_files, notes
+            )
 
             response_time = int((time.time() - start_time) * 1000)
 
@@ -104,8 +98,10 @@ class ChatbotService:
             )
             db.add(user_msg)
 
+            # Kept outside the ORM object: reading it back after the commit would reload the row
+            assistant_message_id = str(uuid.uuid4())
             assistant_msg = ChatbotMessage(
-                message_id=str(uuid.uuid4()),
+                message_id=assistant_message_id,
                 session_id=session_id,
                 role="assistant",
                 content=result["text"],
@@ -122,13 +118,13 @@ class ChatbotService:
                 session.title = message.strip()[:200]
             session.total_messages = (session.total_messages or 0) + 2
 
-            db.commit()
+            await asyncio.to_thread(db.commit)
         except Exception:
-            db.rollback()
+            await asyncio.to_thread(db.rollback)
             raise
 
         return {
-            "message_id": assistant_msg.message_id,
+            "message_id": assistant_message_id,
             "response": result["text"],
             "intent": intent,
             "audio_references": result.get("audio_references", []),
@@ -276,6 +272,25 @@ class ChatbotService:
             raise ValueError("Session not found")
         return session
 
+    def _load_session(self, db: Session, user_id: int, session_id: str):
+        session = self._get_session(db, user_id, session_id)
+        return session, self._get_conversation_history(db, session_id)
+
+    def _handle_intent(
+        self, intent: str, message: str, entities: dict, context: str, audio_files: list, notes: list
+    ) -> dict:
+        if intent == "search":
+            return self._handle_search(audio_files, notes)
+        if intent == "summarize":
+            return self._handle_summarization(context, message)
+        if intent == "question":
+            return self._handle_question(context, message)
+        if intent == "manage":
+            return self._handle_management(entities)
+        if intent == "analytics":
+            return self._handle_analytics(context, message)
+        return self._handle_chat(message)
+
     def _get_conversation_history(self, db: Session, session_id: str, limit: int = 10) -> list:
         messages = (
             db.query(ChatbotMessage)
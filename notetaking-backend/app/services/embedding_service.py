@@ -1,20 +1,18 @@
 """
 Embedding service for generating vector embeddings using Google's text-embedding-005 model.
 """
+import hashlib
+import json
 import logging
-import os
-import random
-import time
-from collections import deque
+from array import array
+from collections import OrderedDict
 from threading import Lock
-from typing import List, Optional
-from google import genai
+from typing import Iterator, List, Optional
 from google.genai import types
-try:
-    from google.genai.errors import ClientError
-except ImportError:  # pragma: no cover - optional dependency guard
-    ClientError = None
-from app.common.constants import Common
+import redis
+from app.common.constants import CacheKeys, Common
+from app.core.gemini_client import RateLimiter, call_with_retry, client, get_float_env, get_int_env
+from app.core.redis_config import REDIS_CLIENT
 
 logger = logging.getLogger(__name__)
 
@@ -24,139 +22,51 @@ _MAX_TOKENS_PER_EMBEDDING = 5000  # Approximate token limit
 _RECOMMENDED_MAX_CHUNK_SIZE = 3000  # Safe limit with margin
 _MAX_TOKENS_PER_BATCH = 18000  # Safe limit for batch requests (model max is 20000)
 
-# Initialize the GenAI client for Vertex AI
-client = genai.Client(
-    vertexai=True,
-    project=os.getenv('GOOGLE_CLOUD_PROJECT'),
-    location=os.getenv('GOOGLE_CLOUD_LOCATION')
-)
-
-
-def _get_int_env(name: str, default: int) -> int:
-    value = os.getenv(name)
-    if value is None or value == "":
-        return default
-    try:
-        return int(value)
-    except ValueError:
-        logger.warning("Invalid %s=%s, using default %d", name, value, default)
-        return default
-
-
-def _get_float_env(name: str, default: float) -> float:
-    value = os.getenv(name)
-    if value is None or value == "":
-        return default
-    try:
-        return float(value)
-    except ValueError:
-        logger.warning("Invalid %s=%s, using default %.2f", name, value, default)
-        return default
-
-
 # Reduced default batch size from 8 to 5 to stay under token limits
-_EMBEDDING_BATCH_SIZE = max(1, _get_int_env("EMBEDDING_BATCH_SIZE", 5))
-_EMBEDDING_MAX_RETRIES = max(0, _get_int_env("EMBEDDING_MAX_RETRIES", 5))
+_EMBEDDING_BATCH_SIZE = max(1, get_int_env("EMBEDDING_BATCH_SIZE", 5))
+_EMBEDDING_MAX_RETRIES = max(0, get_int_env("EMBEDDING_MAX_RETRIES", 5))
 # Increased backoff times to handle rate limits better
-_EMBEDDING_BACKOFF_BASE_SECONDS = max(0.0, _get_float_env("EMBEDDING_BACKOFF_BASE_SECONDS", 1.0))
-_EMBEDDING_BACKOFF_MAX_SECONDS = max(0.0, _get_float_env("EMBEDDING_BACKOFF_MAX_SECONDS", 32.0))
-_EMBEDDING_BACKOFF_JITTER_SECONDS = max(0.0, _get_float_env("EMBEDDING_BACKOFF_JITTER_SECONDS", 0.5))
-_EMBEDDING_RATE_LIMIT_PER_MIN = max(0, _get_int_env("EMBEDDING_RATE_LIMIT_PER_MIN", 0))
+_EMBEDDING_BACKOFF_BASE_SECONDS = max(0.0, get_float_env("EMBEDDING_BACKOFF_BASE_SECONDS", 1.0))
+_EMBEDDING_BACKOFF_MAX_SECONDS = max(0.0, get_float_env("EMBEDDING_BACKOFF_MAX_SECONDS", 32.0))
+_EMBEDDING_BACKOFF_JITTER_SECONDS = max(0.0, get_float_env("EMBEDDING_BACKOFF_JITTER_SECONDS", 0.5))
+_EMBEDDING_RATE_LIMIT_PER_MIN = max(0, get_int_env("EMBEDDING_RATE_LIMIT_PER_MIN", 0))
 # Default to 1 request per second to avoid quota issues
-_EMBEDDING_RATE_LIMIT_PER_SEC = max(0, _get_int_env("EMBEDDING_RATE_LIMIT_PER_SEC", 1))
-
-_rate_limit_lock = Lock()
-_rate_limit_window_min = deque()
-_rate_limit_window_sec = deque()
-
-
-def _trim_rate_limit_window(window: deque, now: float, window_seconds: float) -> None:
-    while window and now - window[0] > window_seconds:
-        window.popleft()
+_EMBEDDING_RATE_LIMIT_PER_SEC = max(0, get_int_env("EMBEDDING_RATE_LIMIT_PER_SEC", 1))
 
+# In-process LRU in front of the shared Redis cache for repeated search queries (~3KB per entry)
+_QUERY_EMBEDDING_CACHE_SIZE = max(0, get_int_env("QUERY_EMBEDDING_CACHE_SIZE", 1000))
 
-def _apply_rate_limit() -> None:
-    if _EMBEDDING_RATE_LIMIT_PER_MIN <= 0 and _EMBEDDING_RATE_LIMIT_PER_SEC <= 0:
-        return
-
-    with _rate_limit_lock:
-        now = time.monotonic()
-
-        if _EMBEDDING_RATE_LIMIT_PER_MIN > 0:
-            _trim_rate_limit_window(_rate_limit_window_min, now, 60.0)
-            if len(_rate_limit_window_min) >= _EMBEDDING_RATE_LIMIT_PER_MIN:
-                sleep_time = 60.0 - (now - _rate_limit_window_min[0])
-                if sleep_time > 0:
-                    logger.info(
-                        "Embedding rate limit hit (per_min=%d). Sleeping %.2fs",
-                        _EMBEDDING_RATE_LIMIT_PER_MIN,
-                        sleep_time,
-                    )
-                    time.sleep(sleep_time)
-                    now = time.monotonic()
-                    _trim_rate_limit_window(_rate_limit_window_min, now, 60.0)
-
-        if _EMBEDDING_RATE_LIMIT_PER_SEC > 0:
-            _trim_rate_limit_window(_rate_limit_window_sec, now, 1.0)
-            if len(_rate_limit_window_sec) >= _EMBEDDING_RATE_LIMIT_PER_SEC:
-                sleep_time = 1.0 - (now - _rate_limit_window_sec[0])
-                if sleep_time > 0:
-                    logger.info(
-                        "Embedding rate limit hit (per_sec=%d). Sleeping %.2fs",
-                        _EMBEDDING_RATE_LIMIT_PER_SEC,
-                        sleep_time,
-                    )
-                    time.sleep(sleep_time)
-                    now = time.monotonic()
-                    _trim_rate_limit_window(_rate_limit_window_sec, now, 1.0)
-
-        if _EMBEDDING_RATE_LIMIT_PER_MIN > 0:
-            _rate_limit_window_min.append(now)
-        if _EMBEDDING_RATE_LIMIT_PER_SEC > 0:
-            _rate_limit_window_sec.append(now)
-
-
-def _is_retryable_error(exc: Exception) -> bool:
-    if ClientError and isinstance(exc, ClientError):
-        status_code = getattr(exc, "status_code", None)
-        if status_code == 429:
-            return True
-    text = str(exc).lower()
-    return "429" in text or "resource_exhausted" in text or "quota" in text
+_embedding_limiter = RateLimiter(
+    "Embedding",
+    per_min=_EMBEDDING_RATE_LIMIT_PER_MIN,
+    per_sec=_EMBEDDING_RATE_LIMIT_PER_SEC,
+)
 
 
-def _get_backoff_seconds(attempt: int) -> float:
-    base = _EMBEDDING_BACKOFF_BASE_SECONDS * (2 ** attempt)
-    backoff = min(_EMBEDDING_BACKOFF_MAX_SECONDS, base)
-    if _EMBEDDING_BACKOFF_JITTER_SECONDS > 0:
-        backoff += random.uniform(0.0, _EMBEDDING_BACKOFF_JITTER_SECONDS)
-    return backoff
+def _embed_content_with_retry(contents, task_type: str):
+    return call_with_retry(
+        lambda: client.models.embed_content(
+            model=Common.EMBEDDING_MODEL,
+            contents=contents,
+            config=types.EmbedContentConfig(
+                task_type=task_type,
+                output_dimensionality=Common.EMBEDDING_DIMENSION
+            ),
+        ),
+        limiter=_embedding_limiter,
+        max_retries=_EMBEDDING_MAX_RETRIES,
+        backoff_base_seconds=_EMBEDDING_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=_EMBEDDING_BACKOFF_MAX_SECONDS,
+        backoff_jitter_seconds=_EMBEDDING_BACKOFF_JITTER_SECONDS,
+    )
 
 
-def _embed_content_with_retry(contents, task_type: str):
-    for attempt in range(_EMBEDDING_MAX_RETRIES + 1):
-        try:
-            _apply_rate_limit()
-            return client.models.embed_content(
-                model=Common.EMBEDDING_MODEL,
-                contents=contents,
-                config=types.EmbedContentConfig(
-                    task_type=task_type,
-                    output_dimensionality=Common.EMBEDDING_DIMENSION
-                ),
-            )
-        except Exception as exc:
-            if not _is_retryable_error(exc) or attempt >= _EMBEDDING_MAX_RETRIES:
-                raise
-            sleep_time = _get_backoff_seconds(attempt)
-            logger.warning(
-                "Embedding request failed with retryable error: %s. Retrying in %.2fs (attempt %d/%d)",
-                exc,
-                sleep_time,
-                attempt + 1,
-                _EMBEDDING_MAX_RETRIES,
-            )
-            time.sleep(sleep_time)
+def _l2_normalize(values) -> Optional[List[float]]:
+    """Scale a vector to unit length so inner product equals cosine similarity."""
+    norm = sum(v * v for v in values) ** 0.5
+    if norm == 0:
+        return None
+    return [v / norm for v in values]
 
 
 def _extract_embeddings(response) -> List[Optional[List[float]]]:
@@ -164,7 +74,7 @@ def _extract_embeddings(response) -> List[Optional[List[float]]]:
         result = []
         for embedding in response.embeddings:
             values = getattr(embedding, "values", None)
-            result.append(list(values) if values is not None else None)
+            result.append(_l2_normalize(values) if values is not None else None)
         return result
     return []
 
@@ -239,7 +149,7 @@ def generate_embedding(text: str, task_type: str = "RETRIEVAL_DOCUMENT") -> Opti
             - CLUSTERING: For text clustering
             
     Returns:
-        List of floats representing the embedding vector (768 dimensions)
+        List of floats representing the L2-normalized embedding vector (768 dimensions)
         Returns None if embedding generation fails
     """
     if not text or not text.strip():
@@ -367,9 +277,33 @@ def generate_embeddings_batch(
     return embeddings
 
 
+# Vectors are kept as packed float32 arrays: a 768-float list costs ~25KB of boxed floats
+_query_embedding_cache: "OrderedDict[str, array]" = OrderedDict()
+_query_embedding_cache_lock = Lock()
+
+
+def _get_local_query_embedding(digest: str) -> Optional[array]:
+    with _query_embedding_cache_lock:
+        embedding = _query_embedding_cache.get(digest)
+        if embedding is not None:
+            _query_embedding_cache.move_to_end(digest)
+        return embedding
+
+
+def _set_local_query_embedding(digest: str, embedding: List[float]) -> None:
+    if _QUERY_EMBEDDING_CACHE_SIZE <= 0:
+        return
+    with _query_embedding_cache_lock:
+        _query_embedding_cache[digest] = array("f", embedding)
+        _query_embedding_cache.move_to_end(digest)
+        while len(_query_embedding_cache) > _QUERY_EMBEDDING_CACHE_SIZE:
+            _query_embedding_cache.popitem(last=False)
+
+
 def generate_query_embedding(query: str) -> Optional[List[float]]:
     """
     Generate embedding specifically for search queries.
+    Results are cached in-process and in Redis, keyed by model and normalized query.
     
     Args:
         query: The search query text
@@ -378,7 +312,40 @@ def generate_query_embedding(query: str) -> Optional[List[float]]:
         List of floats representing the embedding vector
         Returns None if embedding generation fails
     """
-    return generate_embedding(query, task_type="RETRIEVAL_QUERY")
+    normalized_query = " ".join(query.split()) if query else ""
+    if not normalized_query:
+        return generate_embedding(query, task_type="RETRIEVAL_QUERY")
+
+    # Key is case-insensitive so retyped queries share an entry; the first variant's embedding is reused
+    digest = hashlib.sha256(
+        f"{Common.EMBEDDING_MODEL}|{Common.EMBEDDING_DIMENSION}|{normalized_query.casefold()}".encode("utf-8")
+    ).hexdigest()
+
+    embedding = _get_local_query_embedding(digest)
+    if embedding is not None:
+        return list(embedding)
+
+    cache_key = CacheKeys.QUERY_EMBEDDING.format(digest=digest)
+    try:
+        cached = REDIS_CLIENT.get(cache_key)
+    except redis.RedisError as e:
+        logger.warning("Failed to read query embedding cache: %s", str(e))
+        cached = None
+    if cached is not None:
+        embedding = json.loads(cached)
+        _set_local_query_embedding(digest, embedding)
+        return list(embedding)
+
+    embedding = generate_embedding(normalized_query, task_type="RETRIEVAL_QUERY")
+    if embedding is None:
+        return None
+
+    _set_local_query_embedding(digest, embedding)
+    try:
+        REDIS_CLIENT.set(cache_key, json.dumps(embedding), ex=CacheKeys.LONG_TTL)
+    except redis.RedisError as e:
+        logger.warning("Failed to write query embedding cache: %s", str(e))
+    return list(embedding)
 
 
 def generate_document_embedding(document: str) -> Optional[List[float]]:
@@ -439,36 +406,19 @@ def calculate_cosine_similarity(embedding1: List[float], embedding2: List[float]
         return 0.0
 
 
-def chunk_text(
+def iter_text_chunks(
     text: str, 
-    chunk_size: int = 1500,  # Increased default from 500 to 1500
-    chunk_overlap: int = 200,  # Increased default from 100 to 200
+    chunk_size: int = 1500,
+    chunk_overlap: int = 200,
     chunk_type: str = "content"
-) -> List[dict]:
+) -> Iterator[dict]:
     """
-    Split text into overlapping chunks for better RAG performance.
-    
-    Args:
-        text: The text to chunk
-        chunk_size: Target number of characters per chunk (default: 1500)
-        chunk_overlap: Number of characters to overlap between chunks (default: 200)
-        chunk_type: Type of chunk - "content" or "summary"
-        
-    Returns:
-        List of dictionaries containing chunk information:
-        - chunk_text: The text content of the chunk
-        - chunk_index: Order of chunk in original text
-        - chunk_type: Type of chunk
-        - start_char: Starting character position
-        - end_char: Ending character position
-        - token_count: Approximate token count (chars / 4)
-    
-    Raises:
-        ValueError: If chunk_size exceeds recommended limits
+    Lazily split text into overlapping chunks; see chunk_text() for the chunk fields.
+    Lets callers embed and persist long texts in fixed-size batches.
     """
     if not text or not text.strip():
         logger.warning("Empty text provided for chunking")
-        return []
+        return
     
     # Validate chunk size to prevent exceeding API limits
     if chunk_size > _RECOMMENDED_MAX_CHUNK_SIZE:
@@ -489,7 +439,6 @@ def chunk_text(
         chunk_overlap = chunk_size // 5  # 20% overlap
     
     text = text.strip()
-    chunks = []
     start = 0
     chunk_index = 0
     
@@ -518,15 +467,15 @@ def chunk_text(
         # Extract chunk text
         chunk_text = text[start:end].strip()
         
-        if chunk_text:  # Only add non-empty chunks
-            chunks.append({
+        if chunk_text:  # Only yield non-empty chunks
+            yield {
                 "chunk_text": chunk_text,
                 "chunk_index": chunk_index,
                 "chunk_type": chunk_type,
                 "start_char": start,
                 "end_char": end,
                 "token_count": len(chunk_text) // 4  # Rough estimate: 1 token ≈ 4 chars
-            })
+            }
             chunk_index += 1
         
         # Move start position with overlap
@@ -535,11 +484,38 @@ def chunk_text(
         # Avoid infinite loop if chunk is too small
         if start >= len(text) or (end == len(text)):
             break
+
+
+def chunk_text(
+    text: str, 
+    chunk_size: int = 1500,  # Increased default from 500 to 1500
+    chunk_overlap: int = 200,  # Increased default from 100 to 200
+    chunk_type: str = "content"
+) -> List[dict]:
+    """
+    Split text into overlapping chunks for better RAG performance.
     
-    logger.info(
-        "Successfully chunked text: %d chars → %d chunks (type=%s, size=%d, overlap=%d)",
-        len(text), len(chunks), chunk_type, chunk_size, chunk_overlap
-    )
+    Args:
+        text: The text to chunk
+        chunk_size: Target number of characters per chunk (default: 1500)
+        chunk_overlap: Number of characters to overlap between chunks (default: 200)
+        chunk_type: Type of chunk - "content" or "summary"
+        
+    Returns:
+        List of dictionaries containing chunk information:
+        - chunk_text: The text content of the chunk
+        - chunk_index: Order of chunk in original text
+        - chunk_type: Type of chunk
+        - start_char: Starting character position
+        - end_char: Ending character position
+        - token_count: Approximate token count (chars / 4)
+    """
+    chunks = list(iter_text_chunks(text, chunk_size, chunk_overlap, chunk_type))
+    if chunks:
+        logger.info(
+            "Successfully chunked text: %d chars → %d chunks (type=%s, size=%d, overlap=%d)",
+            len(text.strip()), len(chunks), chunk_type, chunk_size, chunk_overlap
+        )
     
     return chunks
 
@@ -1,17 +1,37 @@
 import logging
 from typing import Optional
+import redis
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from fastapi import status
 
 from app.models import Folder, AudioFile, User
+from app.schemas.audio import AudioFileListItem
 from app.schemas.folder import FolderCreate, FolderSearchDto, Folder as FolderSchema
 from app.schemas.pagination import PageDto
+from app.common.constants import CacheKeys, PaginationDefaults
 from app.common.pagination_utils import PaginationHelper
 from app.common.response_common import ResponseCommon
+from app.core.redis_config import REDIS_CLIENT
 
 logger = logging.getLogger(__name__)
 
+# Columns projected by list/search queries instead of loading full entities
+FOLDER_LIST_COLUMNS = (
+    Folder.id,
+    Folder.user_id,
+    Folder.name,
+    Folder.description,
+    Folder.color,
+    Folder.icon,
+    Folder.is_default,
+    Folder.created_at,
+    Folder.updated_at,
+)
+
+# Audio list views skip the (potentially very large) transcription column
+AUDIO_LIST_COLUMNS = tuple(getattr(AudioFile, field) for field in AudioFileListItem.model_fields)
+
 
 class FolderService:
     
@@ -38,6 +58,7 @@ class FolderService:
             db.add(folder)
             db.commit()
             db.refresh(folder)
+            self.invalidate_dropdown_cache(user_id)
             
             # Add audio count
             folder_dict = {
@@ -103,7 +124,7 @@ class FolderService:
     def list_folders(self, db: Session, user_id: int, skip: int = 0, limit: int = 100) -> ResponseCommon:
         """List all folders for a user"""
         folders = db.query(
-            Folder,
+            *FOLDER_LIST_COLUMNS,
             func.count(AudioFile.id).label('audio_count')
         ).outerjoin(
             AudioFile, AudioFile.folder_id == Folder.id
@@ -112,19 +133,9 @@ class FolderService:
         ).group_by(Folder.id).order_by(Folder.created_at.desc()).offset(skip).limit(limit).all()
         
         folders_list = []
-        for folder, audio_count in folders:
-            folder_dict = {
-                "id": folder.id,
-                "user_id": folder.user_id,
-                "name": folder.name,
-                "description": folder.description,
-                "color": folder.color,
-                "icon": folder.icon,
-                "is_default": folder.is_default,
-                "created_at": folder.created_at,
-                "updated_at": folder.updated_at,
-                "audio_count": audio_count or 0
-            }
+        for row in folders:
+            folder_dict = row._asdict()
+            folder_dict["audio_count"] = folder_dict["audio_count"] or 0
             folders_list.append(folder_dict)
         
         return ResponseCommon.success_response(data=folders_list)
@@ -143,10 +154,17 @@ class FolderService:
         Returns:
             PageDto containing folders and pagination metadata
         """
+        cacheable = self._is_plain_dropdown(search_dto)
+        order_key = str(getattr(search_dto.order, "value", search_dto.order)).upper()
+        if cacheable:
+            cached_page = self._get_cached_dropdown(user_id, order_key)
+            if cached_page is not None:
+                return cached_page
+
         try:
             audio_count_expr = func.count(AudioFile.id)
             query = db.query(
-                Folder,
+                *FOLDER_LIST_COLUMNS,
                 audio_count_expr.label("audio_count"),
             ).outerjoin(
                 AudioFile,
@@ -158,9 +176,11 @@ class FolderService:
                 Folder.user_id == user_id
             ).group_by(Folder.id)
 
+            # Row-level filters are shared with the count query; HAVING filters are not
+            folder_filters = []
             if search_dto.search:
                 search_term = f"%{search_dto.search}%"
-                query = query.filter(
+                folder_filters.append(
                     or_(
                         Folder.name.ilike(search_term),
                         Folder.description.ilike(search_term),
@@ -168,29 +188,36 @@ class FolderService:
                 )
 
             if search_dto.is_default is not None:
-                query = query.filter(Folder.is_default == search_dto.is_default)
+                folder_filters.append(Folder.is_default == search_dto.is_default)
 
             if search_dto.color:
-                query = query.filter(Folder.color == search_dto.color)
+                folder_filters.append(Folder.color == search_dto.color)
+
+            if search_dto.from_date:
+                folder_filters.append(Folder.created_at >= search_dto.from_date)
+
+            if search_dto.to_date:
+                folder_filters.append(Folder.created_at <= search_dto.to_date)
 
+            if folder_filters:
+                query = query.filter(*folder_filters)
+
+            has_having = False
             if search_dto.has_audio is not None:
+                has_having = True
                 if search_dto.has_audio:
                     query = query.having(audio_count_expr > 0)
                 else:
                     query = query.having(audio_count_expr == 0)
 
             if search_dto.min_audio_count is not None:
+                has_having = True
                 query = query.having(audio_count_expr >= search_dto.min_audio_count)
 
             if search_dto.max_audio_count is not None:
+                has_having = True
                 query = query.having(audio_count_expr <= search_dto.max_audio_count)
 
-            if search_dto.from_date:
-                query = query.filter(Folder.created_at >= search_dto.from_date)
-
-            if search_dto.to_date:
-                query = query.filter(Folder.created_at <= search_dto.to_date)
-
             order_value = getattr(search_dto.order, "value", search_dto.order)
             if str(order_value).upper() == "ASC":
                 query = query.order_by(Folder.created_at.asc())
@@ -198,20 +225,31 @@ class FolderService:
                 query = query.order_by(Folder.created_at.desc())
 
             if search_dto.is_dropdown:
-                results = query.all()
-                folders_with_count = self._build_folder_search_results(results)
+                results = query.limit(PaginationDefaults.MAX_DROPDOWN_ITEMS).all()
+                folders_with_count = list(self._build_folder_search_results(results))
                 meta = PaginationHelper.create_meta(
                     page=1,
                     page_size=len(folders_with_count),
                     total_items=len(folders_with_count),
                 )
-                return PageDto(data=folders_with_count, meta=meta)
+                page = PageDto[FolderSchema](data=folders_with_count, meta=meta)
+                if cacheable:
+                    self._set_cached_dropdown(user_id, order_key, page)
+                return page
 
-            total_items = db.query(func.count()).select_from(query.subquery()).scalar() or 0
+            if has_having:
+                # Audio-count filters need the grouped query
+                total_items = db.query(func.count()).select_from(query.subquery()).scalar() or 0
+            else:
+                # Audio join only contributes counts, so the total comes straight from folders
+                total_items = db.query(func.count(Folder.id)).filter(
+                    Folder.user_id == user_id,
+                    *folder_filters
+                ).scalar() or 0
             offset = (search_dto.page - 1) * search_dto.page_size
             results = query.offset(offset).limit(search_dto.page_size).all()
 
-            folders_with_count = self._build_folder_search_results(results)
+            folders_with_count = list(self._build_folder_search_results(results))
             meta = PaginationHelper.create_meta(
                 page=search_dto.page,
                 page_size=search_dto.page_size,
@@ -252,6 +290,7 @@ class FolderService:
             
             db.commit()
             db.refresh(folder)
+            self.invalidate_dropdown_cache(user_id)
             
             # Get audio count
             audio_count = db.query(func.count(AudioFile.id)).filter(
@@ -306,6 +345,7 @@ class FolderService:
             # Delete the folder
             db.delete(folder)
             db.commit()
+            self.invalidate_dropdown_cache(user_id)
             
             return ResponseCommon.success_response(
                 message="Folder deleted successfully"
@@ -356,6 +396,7 @@ class FolderService:
             audio.folder_id = folder_id
             db.commit()
             db.refresh(audio)
+            self.invalidate_dropdown_cache(user_id)
             
             message = "Audio file moved to folder" if folder_id else "Audio file removed from folder"
             
@@ -395,66 +436,93 @@ class FolderService:
         folder_id: int, 
         user_id: int,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        include_transcription: bool = False
     ) -> ResponseCommon:
-        """Get all audio files in a specific folder"""
-        # Verify folder exists and belongs to user
-        folder = db.query(Folder).filter(
+        """Get all audio files in a specific folder (transcription only when requested)"""
+        columns = AUDIO_LIST_COLUMNS
+        if include_transcription:
+            columns = columns + (AudioFile.transcription,)
+
+        # Ownership check and audio fetch in one query via the folder join
+        audio_files = db.query(*columns).join(
+            Folder, Folder.id == AudioFile.folder_id
+        ).filter(
             Folder.id == folder_id,
             Folder.user_id == user_id
-        ).first()
-        
-        if not folder:
-            return ResponseCommon.error_response(
-                message="Folder not found",
-                code=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Get audio files
-        audio_files = db.query(AudioFile).filter(
-            AudioFile.folder_id == folder_id
         ).order_by(AudioFile.created_at.desc()).offset(skip).limit(limit).all()
         
-        audio_list = []
-        for audio in audio_files:
-            audio_dict = {
-                "id": audio.id,
-                "user_id": audio.user_id,
-                "folder_id": audio.folder_id,
-                "filename": audio.filename,
-                "original_filename": audio.original_filename,
-                "file_path": audio.file_path,
-                "file_size": audio.file_size,
-                "duration": audio.duration,
-                "format": audio.format,
-                "status": audio.status,
-                "transcription": audio.transcription,
-                "confidence_score": audio.confidence_score,
-                "created_at": audio.created_at,
-                "updated_at": audio.updated_at,
-            }
-            audio_list.append(audio_dict)
+        # An empty page is either an empty/out-of-range folder or a missing one
+        if not audio_files:
+            folder_exists = db.query(
+                db.query(Folder.id).filter(
+                    Folder.id == folder_id,
+                    Folder.user_id == user_id
+                ).exists()
+            ).scalar()
+            if not folder_exists:
+                return ResponseCommon.error_response(
+                    message="Folder not found",
+                    code=status.HTTP_404_NOT_FOUND
+                )
+        
+        audio_list = [row._asdict() for row in audio_files]
         
         return ResponseCommon.success_response(data=audio_list)
 
+    def invalidate_dropdown_cache(self, user_id: int) -> None:
+        """Drop the cached dropdown folder list after folder or audio-count changes"""
+        try:
+            REDIS_CLIENT.delete(CacheKeys.FOLDERS_DROPDOWN.format(user_id=user_id))
+        except redis.RedisError as e:
+            logger.warning("Failed to invalidate folder dropdown cache for user %s: %s", user_id, str(e))
+
+    @staticmethod
+    def _is_plain_dropdown(search_dto: FolderSearchDto) -> bool:
+        """Only unfiltered dropdown requests are served from cache"""
+        return search_dto.is_dropdown and all(
+            value is None
+            for value in (
+                search_dto.search or None,
+                search_dto.is_default,
+                search_dto.color or None,
+                search_dto.has_audio,
+                search_dto.min_audio_count,
+                search_dto.max_audio_count,
+                search_dto.from_date,
+                search_dto.to_date,
+            )
+        )
+
+    @staticmethod
+    def _get_cached_dropdown(user_id: int, order_key: str) -> Optional[PageDto[FolderSchema]]:
+        try:
+            cached = REDIS_CLIENT.hget(CacheKeys.FOLDERS_DROPDOWN.format(user_id=user_id), order_key)
+        except redis.RedisError as e:
+            logger.warning("Failed to read folder dropdown cache for user %s: %s", user_id, str(e))
+            return None
+        if cached is None:
+            return None
+        return PageDto[FolderSchema].model_validate_json(cached)
+
+    @staticmethod
+    def _set_cached_dropdown(user_id: int, order_key: str, page: PageDto[FolderSchema]) -> None:
+        cache_key = CacheKeys.FOLDERS_DROPDOWN.format(user_id=user_id)
+        try:
+            pipe = REDIS_CLIENT.pipeline()
+            pipe.hset(cache_key, order_key, page.model_dump_json())
+            pipe.expire(cache_key, CacheKeys.SHORT_TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Failed to write folder dropdown cache for user %s: %s", user_id, str(e))
+
     @staticmethod
     def _build_folder_search_results(results):
-        folders_with_count = []
-        for folder, audio_count in results:
-            folder_dict = {
-                "id": folder.id,
-                "user_id": folder.user_id,
-                "name": folder.name,
-                "description": folder.description,
-                "color": folder.color,
-                "icon": folder.icon,
-                "is_default": folder.is_default,
-                "created_at": folder.created_at,
-                "updated_at": folder.updated_at,
-                "audio_count": audio_count or 0,
-            }
-            folders_with_count.append(FolderSchema(**folder_dict))
-        return folders_with_count
+        """Yield FolderSchema items built without validation (rows come straight from the DB)."""
+        for row in results:
+            folder_dict = row._asdict()
+            folder_dict["audio_count"] = folder_dict["audio_count"] or 0
+            yield FolderSchema.model_construct(**folder_dict)
 
 
 # Create service instance
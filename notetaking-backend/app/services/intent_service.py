@@ -1,10 +1,61 @@
+import asyncio
 import json
+import logging
 import os
 import re
+import time
 from typing import Optional, List
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+
+from app.schemas.chatbot import IntentResponse
+
+# Caps concurrent in-flight classification calls so bursts of chat traffic
+# don't hammer the Vertex endpoint.
+INTENT_MAX_CONCURRENCY = int(os.getenv("CHATBOT_INTENT_MAX_CONCURRENCY", "32"))
+_intent_semaphore = asyncio.Semaphore(INTENT_MAX_CONCURRENCY)
+
+# The system prompt is registered once as Vertex cached content and referenced
+# by handle. If cache creation fails we fall back to sending it inline and retry
+# later; a prompt below the model's minimum cacheable size disables caching for good.
+INTENT_CACHE_TTL = os.getenv("CHATBOT_INTENT_CACHE_TTL", "3600s")
+INTENT_CACHE_RETRY_SECONDS = 300
+
+_JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# High-signal keywords that identify an intent without calling Gemini. Intents
+# whose handling depends on extracted entities (manage, question) always go to
+# the LLM.
+_FAST_INTENT_PATTERNS = {
+    "chat": re.compile(
+        r"^\s*(xin chào|chào bạn|chào|hello|hi|hey|cảm ơn|cám ơn|thanks|thank you)[\s!.,?]*$",
+        re.IGNORECASE,
+    ),
+    "summarize": re.compile(r"\b(tóm tắt|tổng hợp|summari[sz]e|summary)\b", re.IGNORECASE),
+    "search": re.compile(r"\b(tìm kiếm|tìm bản|tìm ghi|tìm các|tìm file|search|find)\b", re.IGNORECASE),
+    "analytics": re.compile(r"\b(thống kê|phân tích|insight|analytics|statistics)\b", re.IGNORECASE),
+}
+
+# Messages that mention time or explicit IDs need entity extraction (date_range,
+# audio_ids), so they are never fast-pathed.
+_ENTITY_HINT_RE = re.compile(
+    r"\d|\b(hôm nay|hôm qua|tuần|tháng|năm|ngày|today|yesterday|week|month|year)\b",
+    re.IGNORECASE,
+)
+
+# Words that carry no entity. A search/summarize/analytics message is fast-pathed only if
+# nothing but its trigger phrase and these is left, since any other word may be a keyword,
+# category or person name the LLM would have extracted.
+_FAST_PATH_FILLER_RE = re.compile(
+    r"\b(giúp|giùm|hộ|tôi|mình|cho|hãy|xin|vui lòng|các|những|tất cả|của|lại|đi|nhé|với|"
+    r"ghi chú|bản ghi âm|bản ghi|ghi âm|nội dung|"
+    r"please|me|my|all|the|of|notes?|recordings?|content)\b",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"\w")
+
+logger = logging.getLogger(__name__)
 
 
 class IntentService:
@@ -28,19 +79,7 @@ Trích xuất thực thể khi phù hợp:
 - actions: delete, archive, categorize, ...
 - person_names: tên người
 
-CHỈ trả về JSON hợp lệ theo đúng định dạng sau:
-{
-  "intent": "search|summarize|question|manage|analytics|chat",
-  "confidence": 0.0-1.0,
-  "entities": {
-    "date_range": {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"},
-    "keywords": ["keyword1", "keyword2"],
-    "categories": ["meeting"],
-    "audio_ids": [123],
-    "actions": ["delete", "archive"],
-    "person_names": ["John"]
-  }
-}
+Trả về intent, confidence (0.0-1.0) và entities (date_range dạng YYYY-MM-DD).
 """
 
     def __init__(self):
@@ -50,9 +89,18 @@ CHỈ trả về JSON hợp lệ theo đúng định dạng sau:
             location=os.getenv("GOOGLE_CLOUD_LOCATION"),
         )
         self.model_name = os.getenv("CHATBOT_INTENT_MODEL", "gemini-2.5-flash")
+        self._cached_content_name: Optional[str] = None
+        self._cache_retry_at = 0.0
+        self._cache_disabled = False
+        # Serializes caches.create so concurrent first calls don't each create (and pay for) a cache
+        self._cache_lock = asyncio.Lock()
 
-    def classify_intent(self, message: str, conversation_history: Optional[List[dict]] = None) -> dict:
+    async def classify_intent(self, message: str, conversation_history: Optional[List[dict]] = None) -> dict:
         """Classify user intent and extract entities."""
+        fast_result = self._fast_classify(message)
+        if fast_result:
+            return fast_result
+
         context = ""
         if conversation_history:
             recent = conversation_history[-3:]
@@ -63,17 +111,15 @@ CHỈ trả về JSON hợp lệ theo đúng định dạng sau:
 Ngữ cảnh gần đây:
 {context if context else "Không có"}
 
-Hãy phân loại ý định và trích xuất thực thể theo JSON."""
+Hãy phân loại ý định và trích xuất thực thể."""
 
         try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=[
-                    types.Content(role="user", parts=[types.Part(text=self.INTENT_SYSTEM_PROMPT)]),
-                    types.Content(role="user", parts=[types.Part(text=user_prompt)]),
-                ],
-            )
-            parsed = self._extract_json(response.text)
+            async with _intent_semaphore:
+                response = await self._generate(user_prompt)
+            if isinstance(response.parsed, IntentResponse):
+                return response.parsed.model_dump(exclude_none=True)
+            # Defensive fallback: schema-constrained decoding should always parse.
+            parsed = self._extract_json(response.text or "")
             if parsed:
                 return parsed
         except Exception as exc:
@@ -90,13 +136,102 @@ Hãy phân loại ý định và trích xuất thực thể theo JSON."""
             "entities": {},
         }
 
+    def _fast_classify(self, message: str) -> Optional[dict]:
+        """Return a result for unambiguous keyword matches, or None to defer to Gemini."""
+        if _ENTITY_HINT_RE.search(message):
+            return None
+
+        matches = [intent for intent, pattern in _FAST_INTENT_PATTERNS.items() if pattern.search(message)]
+        if len(matches) != 1:
+            return None
+
+        intent = matches[0]
+        if intent != "chat":
+            # The result carries no entities, so anything beyond the trigger and filler words
+            # (keywords, categories, names) goes to Gemini for extraction
+            residue = _FAST_PATH_FILLER_RE.sub(" ", _FAST_INTENT_PATTERNS[intent].sub(" ", message))
+            if _WORD_RE.search(residue):
+                return None
+
+        return {"intent": intent, "confidence": 0.9, "entities": {}}
+
+    async def _generate(self, user_prompt: str):
+        user_content = types.Content(role="user", parts=[types.Part(text=user_prompt)])
+        cached_name = await self._get_cached_content()
+        if cached_name:
+            try:
+                return await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=[user_content],
+                    config=types.GenerateContentConfig(
+                        cached_content=cached_name,
+                        response_mime_type="application/json",
+                        response_schema=IntentResponse,
+                    ),
+                )
+            except errors.ClientError as exc:
+                if exc.code != 404:
+                    raise
+                # Cache expired or was evicted; drop the handle so the next call recreates it.
+                logger.info("Intent prompt cache %s not found, refreshing", cached_name)
+                self._cached_content_name = None
+
+        return await self.client.aio.models.generate_content(
+            model=self.model_name,
+            contents=[
+                types.Content(role="user", parts=[types.Part(text=self.INTENT_SYSTEM_PROMPT)]),
+                user_content,
+            ],
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=IntentResponse,
+            ),
+        )
+
+    def _cache_unavailable(self) -> bool:
+        return self._cache_disabled or time.monotonic() < self._cache_retry_at
+
+    async def _get_cached_content(self) -> Optional[str]:
+        if self._cached_content_name or self._cache_unavailable():
+            return self._cached_content_name
+
+        async with self._cache_lock:
+            # Another caller may have created the cache (or failed) while we waited
+            if self._cached_content_name or self._cache_unavailable():
+                return self._cached_content_name
+
+            try:
+                cached = await self.client.aio.caches.create(
+                    model=self.model_name,
+                    config=types.CreateCachedContentConfig(
+                        contents=[
+                            types.Content(role="user", parts=[types.Part(text=self.INTENT_SYSTEM_PROMPT)]),
+                        ],
+                        ttl=INTENT_CACHE_TTL,
+                    ),
+                )
+                self._cached_content_name = cached.name
+            except errors.ClientError as exc:
+                if exc.code == 400 and "minimum" in str(exc).lower():
+                    # The prompt will never reach the minimum cacheable size; stop retrying
+                    logger.info("Intent system prompt is too small to cache, sending inline: %s", exc)
+                    self._cache_disabled = True
+                else:
+                    logger.warning("Could not cache intent system prompt, sending inline: %s", exc)
+                    self._cache_retry_at = time.monotonic() + INTENT_CACHE_RETRY_SECONDS
+            except Exception as exc:
+                logger.warning("Could not cache intent system prompt, sending inline: %s", exc)
+                self._cache_retry_at = time.monotonic() + INTENT_CACHE_RETRY_SECONDS
+
+        return self._cached_content_name
+
     def _extract_json(self, text: str) -> Optional[dict]:
         try:
             return json.loads(text)
         except Exception:
             pass
 
-        match = re.search(r"\{.*\}", text, re.DOTALL)
+        match = _JSON_BLOCK_RE.search(text)
         if not match:
             return None
 
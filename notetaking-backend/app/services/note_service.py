@@ -1,49 +1,288 @@
+import asyncio
+import hashlib
+import itertools
+import json
 import os
+from types import MappingProxyType
 from typing import Optional
-from google import genai
 from google.genai import types
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, cast, func
-from pgvector.sqlalchemy import Vector
+from sqlalchemy import or_, cast, func, insert, lambda_stmt, literal_column, select
+from pgvector.sqlalchemy import HALFVEC
 from fastapi import status
 import logging
+import redis
 
 from app.common.common_message import CommonMessage
-from app.common.constants import AIPrompts
+from app.common.constants import AIPrompts, CacheKeys
 from app.common.pagination_utils import PaginationHelper
 from app.models import AudioFile, Note, NoteChunk
 from app.common.response_common import ResponseCommon
-from app.schemas.note import Note as NoteSchema, NoteSearchDto
+from app.schemas.note import Note as NoteSchema, NoteListItem, NoteSearchDto
 from app.schemas.pagination import PageDto, SortOrder
+from app.core import gemini_client
+from app.core.redis_config import REDIS_CLIENT
 from app.services.embedding_service import (
     chunk_text, 
     generate_chunk_embeddings, 
-    generate_query_embedding
+    generate_query_embedding,
+    iter_text_chunks
 )
 
 logger = logging.getLogger(__name__)
 
+# Must stay identical to the ix_notes_search_trgm expression so ILIKE can use the index
+NOTE_SEARCH_TEXT = (
+    Note.title
+    + literal_column("' '") + func.coalesce(Note.content, literal_column("''"))
+    + literal_column("' '") + func.coalesce(Note.summary, literal_column("''"))
+)
+
+# Priority levels never change, so the response is built once at import
+NOTE_PRIORITIES = ("low", "normal", "high", "urgent")
+_PRIORITIES_RESPONSE = ResponseCommon.success_response(
+    data=NOTE_PRIORITIES,
+    message=CommonMessage.NOTE_PRIORITIES_RETRIEVED_SUCCESS
+)
+
+# Columns projected for list views instead of loading full notes
+NOTE_LIST_COLUMNS = tuple(getattr(Note, field) for field in NoteListItem.model_fields)
 
-# Initialize the GenAI client for Vertex AI
-client = genai.Client(
-    vertexai=True, 
-    project=os.getenv('GOOGLE_CLOUD_PROJECT'), 
-    location=os.getenv('GOOGLE_CLOUD_LOCATION')
+SUMMARY_MODEL = "gemini-2.5-flash"
+SUMMARY_TIMEOUT_SECONDS = int(os.getenv("SUMMARY_TIMEOUT_SECONDS", "7200"))
+SUMMARY_REQUEST_OPTIONS = MappingProxyType({"timeout": SUMMARY_TIMEOUT_SECONDS})
+SUMMARY_GENERATION_CONFIG = types.GenerateContentConfig(
+    system_instruction=AIPrompts.SUMMARY_SYSTEM_PROMPT,
+    temperature=0.7,
 )
 
+NOTE_CHUNK_SIZE = 1500  # Increased from 500 to reduce API calls
+NOTE_CHUNK_OVERLAP = 200  # Increased proportionally
+NOTE_CHUNK_BATCH_SIZE = 32  # Chunks embedded and inserted per round when persisting
+
+
+def _get_owned_note(db: Session, note_id: int, user_id: int) -> Optional[Note]:
+    """
+    Load a note by ID, scoped to its owner. Built with lambda_stmt so the compiled
+    SQL is cached and only the parameters are rebound per request.
+    """
+    stmt = lambda_stmt(
+        lambda: select(Note).where(Note.id == note_id, Note.user_id == user_id).limit(1)
+    )
+    return db.execute(stmt).scalars().first()
+
+
+def _chunk_hash(text: str) -> str:
+    """Stable hash of a chunk's text, used to reuse embeddings of unchanged chunks."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _bulk_insert_note_chunks(db: Session, note_id: int, chunks_with_embeddings: list) -> int:
+    """
+    Insert embedded chunks for a note with a single executemany INSERT.
+    Chunks whose embedding failed to generate are skipped.
+
+    Returns:
+        Number of chunk rows inserted
+    """
+    rows = [
+        {
+            "note_id": note_id,
+            "chunk_text": chunk_data["chunk_text"],
+            "chunk_index": chunk_data["chunk_index"],
+            "chunk_type": chunk_data["chunk_type"],
+            "embedding": chunk_data["embedding"],
+            "start_char": chunk_data["start_char"],
+            "end_char": chunk_data["end_char"],
+            "token_count": chunk_data["token_count"],
+            "chunk_hash": chunk_data.get("chunk_hash") or _chunk_hash(chunk_data["chunk_text"]),
+        }
+        for chunk_data in chunks_with_embeddings
+        if chunk_data["embedding"] is not None  # Only save if embedding was generated
+    ]
+    if rows:
+        db.execute(insert(NoteChunk), rows)
+    return len(rows)
+
+
+def _generate_summary_text(user_prompt: str) -> str:
+    """
+    Stream the Quill Delta summary from Gemini (blocking; run off the event loop).
+    Streaming keeps the connection active during long generations instead of
+    waiting on one buffered response.
+    """
+    try:
+        summary_text = gemini_client.generate_content_stream_text(
+            model=SUMMARY_MODEL,
+            contents=user_prompt,
+            config=SUMMARY_GENERATION_CONFIG,
+            request_options=SUMMARY_REQUEST_OPTIONS,
+        )
+    except TypeError:
+        summary_text = gemini_client.generate_content_stream_text(
+            model=SUMMARY_MODEL,
+            contents=user_prompt,
+            config=SUMMARY_GENERATION_CONFIG,
+        )
+
+    return summary_text.strip()
+
+
+def _summary_cache_key(user_prompt: str) -> str:
+    """Key on everything that shapes the output, so a model or prompt change misses."""
+    digest = hashlib.sha256(
+        "\0".join((SUMMARY_MODEL, AIPrompts.SUMMARY_SYSTEM_PROMPT, user_prompt)).encode("utf-8")
+    ).hexdigest()
+    return CacheKeys.NOTE_SUMMARY.format(digest=digest)
+
+
+def _get_cached_summary(cache_key: str) -> Optional[str]:
+    try:
+        return REDIS_CLIENT.get(cache_key)
+    except redis.RedisError as e:
+        logger.warning("Failed to read summary cache: %s", str(e))
+        return None
+
+
+def _set_cached_summary(cache_key: str, summary_json: str) -> None:
+    try:
+        REDIS_CLIENT.set(cache_key, summary_json, ex=CacheKeys.LONG_TTL)
+    except redis.RedisError as e:
+        logger.warning("Failed to write summary cache: %s", str(e))
+
+
+def _chunk_and_embed(text: str, chunk_type: str) -> list:
+    """
+    Chunk text and generate embeddings for the chunks (blocking; run off the event loop).
+    """
+    chunks = chunk_text(
+        text,
+        chunk_size=NOTE_CHUNK_SIZE,
+        chunk_overlap=NOTE_CHUNK_OVERLAP,
+        chunk_type=chunk_type
+    )
+    if not chunks:
+        return []
+    return generate_chunk_embeddings(chunks)
+
+
+def _persist_note_chunks(
+    db: Session,
+    note_id: int,
+    texts_by_type: dict,
+    *,
+    replace_existing: bool = False,
+    embedded_chunks: Optional[list] = None
+) -> int:
+    """
+    Chunk, embed and bulk-insert note text, keyed by chunk type ("content"/"summary").
+    Chunks are embedded and inserted in rounds of NOTE_CHUNK_BATCH_SIZE.
+
+    Args:
+        texts_by_type: Text to chunk per chunk type; empty values are skipped
+        replace_existing: Delete the note's existing chunks of those types first,
+            reusing stored embeddings of chunks whose text is unchanged
+        embedded_chunks: Chunks already carrying embeddings, inserted as-is
+
+    Returns:
+        Number of chunk rows inserted
+    """
+    texts_by_type = {chunk_type: text for chunk_type, text in texts_by_type.items() if text}
+    ready_chunks = list(embedded_chunks or [])
+    chunks_to_embed = []
+
+    existing_embeddings = {}
+    if replace_existing and texts_by_type:
+        existing_embeddings = {
+            (row.chunk_type, row.chunk_hash): row.embedding
+            for row in db.query(NoteChunk.chunk_type, NoteChunk.chunk_hash, NoteChunk.embedding).filter(
+                NoteChunk.note_id == note_id,
+                NoteChunk.chunk_type.in_(texts_by_type),
+                NoteChunk.chunk_hash.isnot(None)
+            )
+        }
+        db.query(NoteChunk).filter(
+            NoteChunk.note_id == note_id,
+            NoteChunk.chunk_type.in_(texts_by_type)
+        ).delete(synchronize_session=False)
+
+    # Chunks are produced lazily and embedded/inserted in fixed-size batches, so a
+    # long transcript never holds all of its chunks and embeddings in memory at once
+    inserted = 0
+    saved = 0
+    newly_embedded = 0
+    all_chunks = itertools.chain.from_iterable(
+        iter_text_chunks(
+            text,
+            chunk_size=NOTE_CHUNK_SIZE,
+            chunk_overlap=NOTE_CHUNK_OVERLAP,
+            chunk_type=chunk_type
+        )
+        for chunk_type, text in texts_by_type.items()
+    )
+    for chunk in itertools.chain(all_chunks, [None]):
+        if chunk is not None:
+            chunk["chunk_hash"] = _chunk_hash(chunk["chunk_text"])
+            embedding = existing_embeddings.get((chunk["chunk_type"], chunk["chunk_hash"]))
+            if embedding is not None:
+                chunk["embedding"] = embedding
+                ready_chunks.append(chunk)
+            else:
+                chunks_to_embed.append(chunk)
+
+        # None marks the end of input: flush whatever is left
+        if chunks_to_embed and (chunk is None or len(chunks_to_embed) >= NOTE_CHUNK_BATCH_SIZE):
+            ready_chunks.extend(generate_chunk_embeddings(chunks_to_embed))
+            newly_embedded += len(chunks_to_embed)
+            chunks_to_embed = []
+        if ready_chunks and (chunk is None or len(ready_chunks) >= NOTE_CHUNK_BATCH_SIZE):
+            inserted += _bulk_insert_note_chunks(db, note_id, ready_chunks)
+            saved += len(ready_chunks)
+            ready_chunks = []
+
+    if not saved:
+        return 0
+
+    logger.info(
+        "Saved %d/%d chunks for note %s (%d already embedded, %d newly embedded)",
+        inserted,
+        saved,
+        note_id,
+        saved - newly_embedded,
+        newly_embedded
+    )
+    return inserted
+
+
+def _get_user_audio_file(db: Session, audio_file_id: int, user_id: int) -> Optional[AudioFile]:
+    return db.query(AudioFile).filter(
+        AudioFile.id == audio_file_id,
+        AudioFile.user_id == user_id
+    ).first()
+
+
+def _save_summary_note(db: Session, note: Note, embedded_chunks: list) -> None:
+    """Insert the note and its embedded chunks in one transaction."""
+    db.add(note)
+    db.flush()  # Get note.id without committing
+
+    _persist_note_chunks(db, note.id, {}, embedded_chunks=embedded_chunks)
+
+    db.commit()
+    db.refresh(note)
+    invalidate_note_categories_cache(note.user_id)
+
 
-def summarize_audio_transcript(
+async def summarize_audio_transcript(
     db: Session,
     audio_file_id: int,
     user_id: int
 ) -> ResponseCommon:
     """
     Summarize an audio file's transcription and create a note.
+    DB work runs via asyncio.to_thread so the caller's event loop stays free.
     """
-    audio_file = db.query(AudioFile).filter(
-        AudioFile.id == audio_file_id,
-        AudioFile.user_id == user_id
-    ).first()
+    audio_file = await asyncio.to_thread(_get_user_audio_file, db, audio_file_id, user_id)
     
     if not audio_file:
         return ResponseCommon.error_response(
@@ -57,47 +296,42 @@ def summarize_audio_transcript(
             code=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        user_prompt = AIPrompts.SUMMARY_USER_PROMPT.format(content=audio_file.transcription)
+    user_prompt = AIPrompts.SUMMARY_USER_PROMPT.format(content=audio_file.transcription)
+    summary_cache_key = _summary_cache_key(user_prompt)
+    cached_summary = await asyncio.to_thread(_get_cached_summary, summary_cache_key)
+    if cached_summary is not None:
+        logger.info("Using cached summary for audio_file_id=%s", audio_file_id)
+        summary_call = asyncio.sleep(0, result=cached_summary)
+    else:
+        summary_call = asyncio.to_thread(_generate_summary_text, user_prompt)
 
-        timeout_seconds = int(os.getenv("SUMMARY_TIMEOUT_SECONDS", "7200"))
-        request_options = {"timeout": timeout_seconds}
+    # Content chunks only depend on the transcription, so embed them while Gemini summarizes
+    summary_result, content_result = await asyncio.gather(
+        summary_call,
+        asyncio.to_thread(_chunk_and_embed, audio_file.transcription, "content"),
+        return_exceptions=True,
+    )
 
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=user_prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=AIPrompts.SUMMARY_SYSTEM_PROMPT,
-                    temperature=0.7,
-                ),
-                request_options=request_options,
-            )
-        except TypeError:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=user_prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=AIPrompts.SUMMARY_SYSTEM_PROMPT,
-                    temperature=0.7,
-                ),
-            )
+    try:
+        if isinstance(summary_result, BaseException):
+            raise summary_result
 
         logger.info("🚀 ~ NoteService ~ summarize_audio_transcript ~ generated summary for audio_file_id=%s", audio_file_id)
         
         # Parse and validate Quill Delta JSON
-        summary_json_text = response.text.strip()
+        summary_json_text = summary_result
         logger.info("🚀 ~ NoteService ~ summarize_audio_transcript ~ raw_json_response=%s", summary_json_text)
         
         # Validate JSON format
-        import json
         try:
             summary_delta = json.loads(summary_json_text)
             if not isinstance(summary_delta, list):
                 raise ValueError("Summary must be a JSON array (Quill Delta format)")
             logger.info("✅ Valid Quill Delta JSON with %d operations", len(summary_delta))
-            # Store as JSON string for database
-            summary_json = json.dumps(summary_delta, ensure_ascii=False)
+            # Gemini's text already is valid JSON; store it as-is instead of re-serializing
+            summary_json = summary_json_text
+            if cached_summary is None:
+                await asyncio.to_thread(_set_cached_summary, summary_cache_key, summary_json)
         except json.JSONDecodeError as je:
             logger.error("Invalid JSON from Gemini: %s", je)
             return ResponseCommon.error_response(
@@ -113,6 +347,12 @@ def summarize_audio_transcript(
         )
     
     try:
+        if isinstance(content_result, BaseException):
+            raise content_result
+
+        # Summary chunks depend on the Gemini output, so they are embedded afterwards
+        summary_chunks = await asyncio.to_thread(_chunk_and_embed, summary_json, "summary")
+
         title = audio_file.original_filename.rsplit('.', 1)[0][:100]
         if not title:
             title = f"Note from {audio_file.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -128,69 +368,7 @@ def summarize_audio_transcript(
             tags="audio,transcription"
         )
         
-        db.add(note)
-        db.flush()  # Get note.id without committing
-        
-        # Generate chunks with embeddings for content
-        if audio_file.transcription:
-            content_chunks = chunk_text(
-                audio_file.transcription,
-                chunk_size=1500,  # Increased from 500 to reduce API calls
-                chunk_overlap=200,  # Increased proportionally
-                chunk_type="content"
-            )
-            
-            if content_chunks:
-                content_chunks_with_embeddings = generate_chunk_embeddings(content_chunks)
-                
-                # Save chunks to database
-                for chunk_data in content_chunks_with_embeddings:
-                    if chunk_data["embedding"]:  # Only save if embedding was generated
-                        note_chunk = NoteChunk(
-                            note_id=note.id,
-                            chunk_text=chunk_data["chunk_text"],
-                            chunk_index=chunk_data["chunk_index"],
-                            chunk_type=chunk_data["chunk_type"],
-                            embedding=chunk_data["embedding"],
-                            start_char=chunk_data["start_char"],
-                            end_char=chunk_data["end_char"],
-                            token_count=chunk_data["token_count"]
-                        )
-                        db.add(note_chunk)
-                
-                logger.info("Created %d content chunks for note %s", len(content_chunks_with_embeddings), note.id)
-        
-        # Generate chunks with embeddings for summary
-        if summary_json:
-            summary_chunks = chunk_text(
-                summary_json,
-                chunk_size=1500,  # Increased from 500 to reduce API calls
-                chunk_overlap=200,  # Increased proportionally
-                chunk_type="summary"
-            )
-            
-            if summary_chunks:
-                summary_chunks_with_embeddings = generate_chunk_embeddings(summary_chunks)
-                
-                # Save chunks to database
-                for chunk_data in summary_chunks_with_embeddings:
-                    if chunk_data["embedding"]:  # Only save if embedding was generated
-                        note_chunk = NoteChunk(
-                            note_id=note.id,
-                            chunk_text=chunk_data["chunk_text"],
-                            chunk_index=chunk_data["chunk_index"],
-                            chunk_type=chunk_data["chunk_type"],
-                            embedding=chunk_data["embedding"],
-                            start_char=chunk_data["start_char"],
-                            end_char=chunk_data["end_char"],
-                            token_count=chunk_data["token_count"]
-                        )
-                        db.add(note_chunk)
-                
-                logger.info("Created %d summary chunks for note %s", len(summary_chunks_with_embeddings), note.id)
-        
-        db.commit()
-        db.refresh(note)
+        await asyncio.to_thread(_save_summary_note, db, note, content_result + summary_chunks)
         
         logger.info("Created note %s with summary for audio %s", note.id, audio_file_id)
         
@@ -205,7 +383,7 @@ def summarize_audio_transcript(
         )
         
     except Exception as e:
-        db.rollback()
+        await asyncio.to_thread(db.rollback)
         logger.error("Failed to create note: %s", e, exc_info=True)
         return ResponseCommon.error_response(
             message=CommonMessage.NOTE_CREATE_FAILED,
@@ -226,17 +404,19 @@ def search_notes(db: Session, user_id: int, search_dto: NoteSearchDto) -> PageDt
 
     Returns:
         PageDto with notes and pagination metadata
+        (NoteListItem rows without the large text columns when list_view is set)
     """
-    query = db.query(Note).filter(Note.user_id == user_id)
+    if search_dto.list_view:
+        query = db.query(*NOTE_LIST_COLUMNS).filter(Note.user_id == user_id)
+    else:
+        query = db.query(Note).filter(Note.user_id == user_id)
 
     if search_dto.search:
         search_term = f"%{search_dto.search}%"
         query = query.filter(
             or_(
-                Note.title.ilike(search_term),
-                Note.content.ilike(search_term),
-                Note.summary.ilike(search_term),
-                Note.tags.ilike(search_term),
+                NOTE_SEARCH_TEXT.ilike(search_term),
+                Note.tags.contains([search_dto.search.strip()]),
             )
         )
 
@@ -261,7 +441,9 @@ def search_notes(db: Session, user_id: int, search_dto: NoteSearchDto) -> PageDt
         query = query.filter(Note.audio_file_id == search_dto.audio_file_id)
 
     if search_dto.tags:
-        query = query.filter(Note.tags.ilike(f"%{search_dto.tags}%"))
+        tags = [tag.strip() for tag in search_dto.tags.split(",") if tag.strip()]
+        if tags:
+            query = query.filter(Note.tags.contains(tags))
 
     if search_dto.from_date:
         query = query.filter(Note.created_at >= search_dto.from_date)
@@ -278,7 +460,7 @@ def search_notes(db: Session, user_id: int, search_dto: NoteSearchDto) -> PageDt
     return PaginationHelper.paginate_query(
         query=query,
         page_options=search_dto,
-        response_model=NoteSchema,
+        response_model=NoteListItem if search_dto.list_view else NoteSchema,
     )
 
 
@@ -346,10 +528,7 @@ def get_note_by_id(db: Session, note_id: int, user_id: int) -> ResponseCommon:
     Raises:
         HTTPException: If note not found or user doesn't own it
     """
-    note = db.query(Note).filter(
-        Note.id == note_id,
-        Note.user_id == user_id
-    ).first()
+    note = _get_owned_note(db, note_id, user_id)
     
     if not note:
         return ResponseCommon.error_response(
@@ -404,64 +583,15 @@ def create_note(db: Session, user_id: int, note_data: dict) -> ResponseCommon:
         db.add(note)
         db.flush()  # Get note.id without committing
         
-        # Generate chunks with embeddings for content
-        if note_data.get("content"):
-            content_chunks = chunk_text(
-                note_data["content"],
-                chunk_size=1500,
-                chunk_overlap=200,
-                chunk_type="content"
-            )
-            
-            if content_chunks:
-                content_chunks_with_embeddings = generate_chunk_embeddings(content_chunks)
-                
-                for chunk_data in content_chunks_with_embeddings:
-                    if chunk_data["embedding"]:
-                        note_chunk = NoteChunk(
-                            note_id=note.id,
-                            chunk_text=chunk_data["chunk_text"],
-                            chunk_index=chunk_data["chunk_index"],
-                            chunk_type=chunk_data["chunk_type"],
-                            embedding=chunk_data["embedding"],
-                            start_char=chunk_data["start_char"],
-                            end_char=chunk_data["end_char"],
-                            token_count=chunk_data["token_count"]
-                        )
-                        db.add(note_chunk)
-                
-                logger.info("Generated %d content chunks for new note", len(content_chunks_with_embeddings))
-        
-        # Generate chunks with embeddings for summary
-        if note_data.get("summary"):
-            summary_chunks = chunk_text(
-                note_data["summary"],
-                chunk_size=1500,
-                chunk_overlap=200,
-                chunk_type="summary"
-            )
-            
-            if summary_chunks:
-                summary_chunks_with_embeddings = generate_chunk_embeddings(summary_chunks)
-                
-                for chunk_data in summary_chunks_with_embeddings:
-                    if chunk_data["embedding"]:
-                        note_chunk = NoteChunk(
-                            note_id=note.id,
-                            chunk_text=chunk_data["chunk_text"],
-                            chunk_index=chunk_data["chunk_index"],
-                            chunk_type=chunk_data["chunk_type"],
-                            embedding=chunk_data["embedding"],
-                            start_char=chunk_data["start_char"],
-                            end_char=chunk_data["end_char"],
-                            token_count=chunk_data["token_count"]
-                        )
-                        db.add(note_chunk)
-                
-                logger.info("Generated %d summary chunks for new note", len(summary_chunks_with_embeddings))
+        _persist_note_chunks(
+            db,
+            note.id,
+            {"content": note_data.get("content"), "summary": note_data.get("summary")}
+        )
         
         db.commit()
         db.refresh(note)
+        invalidate_note_categories_cache(user_id)
         
         logger.info("Created note %s for user %s", note.id, user_id)
         note_schema = NoteSchema.model_validate(note)
@@ -497,10 +627,7 @@ def update_note(db: Session, note_id: int, user_id: int, update_data: dict) -> R
         HTTPException: If note not found or update fails
     """
     # Query the database directly to get the SQLAlchemy model (not the Pydantic schema)
-    note = db.query(Note).filter(
-        Note.id == note_id,
-        Note.user_id == user_id
-    ).first()
+    note = _get_owned_note(db, note_id, user_id)
     
     if not note:
         return ResponseCommon.error_response(
@@ -509,74 +636,13 @@ def update_note(db: Session, note_id: int, user_id: int, update_data: dict) -> R
         )
     
     try:
-        # Generate new chunks with embeddings if content or summary is updated
-        if "content" in update_data and update_data["content"]:
-            # Delete old content chunks
-            db.query(NoteChunk).filter(
-                NoteChunk.note_id == note_id,
-                NoteChunk.chunk_type == "content"
-            ).delete()
-            
-            # Create new content chunks
-            content_chunks = chunk_text(
-                update_data["content"],
-                chunk_size=1500,
-                chunk_overlap=200,
-                chunk_type="content"
-            )
-            
-            if content_chunks:
-                content_chunks_with_embeddings = generate_chunk_embeddings(content_chunks)
-                
-                for chunk_data in content_chunks_with_embeddings:
-                    if chunk_data["embedding"]:
-                        note_chunk = NoteChunk(
-                            note_id=note_id,
-                            chunk_text=chunk_data["chunk_text"],
-                            chunk_index=chunk_data["chunk_index"],
-                            chunk_type=chunk_data["chunk_type"],
-                            embedding=chunk_data["embedding"],
-                            start_char=chunk_data["start_char"],
-                            end_char=chunk_data["end_char"],
-                            token_count=chunk_data["token_count"]
-                        )
-                        db.add(note_chunk)
-                
-                logger.info("Updated %d content chunks for note %s", len(content_chunks_with_embeddings), note_id)
-        
-        if "summary" in update_data and update_data["summary"]:
-            # Delete old summary chunks
-            db.query(NoteChunk).filter(
-                NoteChunk.note_id == note_id,
-                NoteChunk.chunk_type == "summary"
-            ).delete()
-            
-            # Create new summary chunks
-            summary_chunks = chunk_text(
-                update_data["summary"],
-                chunk_size=1500,
-                chunk_overlap=200,
-                chunk_type="summary"
-            )
-            
-            if summary_chunks:
-                summary_chunks_with_embeddings = generate_chunk_embeddings(summary_chunks)
-                
-                for chunk_data in summary_chunks_with_embeddings:
-                    if chunk_data["embedding"]:
-                        note_chunk = NoteChunk(
-                            note_id=note_id,
-                            chunk_text=chunk_data["chunk_text"],
-                            chunk_index=chunk_data["chunk_index"],
-                            chunk_type=chunk_data["chunk_type"],
-                            embedding=chunk_data["embedding"],
-                            start_char=chunk_data["start_char"],
-                            end_char=chunk_data["end_char"],
-                            token_count=chunk_data["token_count"]
-                        )
-                        db.add(note_chunk)
-                
-                logger.info("Updated %d summary chunks for note %s", len(summary_chunks_with_embeddings), note_id)
+        # Re-chunk content/summary only when the text actually changed
+        changed_texts = {
+            chunk_type: update_data[chunk_type]
+            for chunk_type in ("content", "summary")
+            if update_data.get(chunk_type) and update_data[chunk_type] != getattr(note, chunk_type)
+        }
+        _persist_note_chunks(db, note_id, changed_texts, replace_existing=True)
         
         # Update only provided fields
         for field, value in update_data.items():
@@ -585,6 +651,8 @@ def update_note(db: Session, note_id: int, user_id: int, update_data: dict) -> R
         
         db.commit()
         db.refresh(note)
+        if "category" in update_data:
+            invalidate_note_categories_cache(user_id)
         
         logger.info("Updated note %s", note_id)
         note_schema = NoteSchema.model_validate(note)
@@ -618,10 +686,7 @@ def delete_note(db: Session, note_id: int, user_id: int) -> ResponseCommon:
         HTTPException: If note not found or deletion fails
     """
     # Query the database directly to get the SQLAlchemy model (not the Pydantic schema)
-    note = db.query(Note).filter(
-        Note.id == note_id,
-        Note.user_id == user_id
-    ).first()
+    note = _get_owned_note(db, note_id, user_id)
     
     if not note:
         return ResponseCommon.error_response(
@@ -632,6 +697,7 @@ def delete_note(db: Session, note_id: int, user_id: int) -> ResponseCommon:
     try:
         db.delete(note)
         db.commit()
+        invalidate_note_categories_cache(user_id)
         
         logger.info("Deleted note %s", note_id)
         return ResponseCommon.success_response(
@@ -658,17 +724,46 @@ def get_note_categories(db: Session, user_id: int) -> ResponseCommon:
     Returns:
         List of category strings
     """
-    categories = db.query(Note.category).filter(
-        Note.user_id == user_id,
-        Note.category.isnot(None)
-    ).distinct().all()
+    cache_key = CacheKeys.NOTE_CATEGORIES.format(user_id=user_id)
+    try:
+        cached = REDIS_CLIENT.get(cache_key)
+    except redis.RedisError as e:
+        logger.warning("Failed to read note categories cache for user %s: %s", user_id, str(e))
+        cached = None
+    if cached is not None:
+        return ResponseCommon.success_response(
+            data=json.loads(cached),
+            message=CommonMessage.NOTE_CATEGORIES_RETRIEVED_SUCCESS
+        )
+    
+    # Served by the partial (user_id, category) index
+    categories = db.execute(
+        select(Note.category).where(
+            Note.user_id == user_id,
+            Note.category.isnot(None)
+        ).distinct()
+    ).scalars().all()
+    categories = [category for category in categories if category]
+    
+    try:
+        REDIS_CLIENT.set(cache_key, json.dumps(categories), ex=CacheKeys.SHORT_TTL)
+    except redis.RedisError as e:
+        logger.warning("Failed to write note categories cache for user %s: %s", user_id, str(e))
     
     return ResponseCommon.success_response(
-        data=[cat[0] for cat in categories if cat[0]],
+        data=categories,
         message=CommonMessage.NOTE_CATEGORIES_RETRIEVED_SUCCESS
     )
 
 
+def invalidate_note_categories_cache(user_id: int) -> None:
+    """Drop the cached category list after a note is created, deleted or recategorized."""
+    try:
+        REDIS_CLIENT.delete(CacheKeys.NOTE_CATEGORIES.format(user_id=user_id))
+    except redis.RedisError as e:
+        logger.warning("Failed to invalidate note categories cache for user %s: %s", user_id, str(e))
+
+
 def get_note_priorities() -> ResponseCommon:
     """
     Get list of available priority levels.
@@ -676,10 +771,7 @@ def get_note_priorities() -> ResponseCommon:
     Returns:
         List of priority strings
     """
-    return ResponseCommon.success_response(
-        data=["low", "normal", "high", "urgent"],
-        message=CommonMessage.NOTE_PRIORITIES_RETRIEVED_SUCCESS
-    )
+    return _PRIORITIES_RESPONSE
 
 
 def semantic_search_notes(
@@ -715,13 +807,18 @@ def semantic_search_notes(
         )
     
     try:
-        # Cast embedding to vector type for pgvector cosine_distance function
-        embedding_vector = cast(query_embedding, Vector(768))
-        
-        # Build query to search through chunks
-        chunk_query = db.query(
-            NoteChunk.note_id,
-            func.max(1 - func.cosine_distance(NoteChunk.embedding, embedding_vector)).label('max_similarity')
+        # Embeddings are stored L2-normalized, so negative inner product (<#>) ranks
+        # exactly like cosine distance
+        embedding_vector = cast(query_embedding, HALFVEC(768))
+        distance = NoteChunk.embedding.max_inner_product(embedding_vector)
+        
+        # Exact ranking over the user's own chunks: an HNSW top-K taken before the
+        # user_id filter is dominated by other users' chunks and can come back empty.
+        # MATERIALIZED keeps the planner from pushing the ORDER BY onto the HNSW index.
+        user_chunks = db.query(
+            NoteChunk.id.label("chunk_id"),
+            NoteChunk.note_id.label("note_id"),
+            (-distance).label("similarity")
         ).join(
             Note, NoteChunk.note_id == Note.id
         ).filter(
@@ -731,22 +828,40 @@ def semantic_search_notes(
         
         # Filter by chunk_type based on search_in parameter
         if search_in == "content":
-            chunk_query = chunk_query.filter(NoteChunk.chunk_type == "content")
+            user_chunks = user_chunks.filter(NoteChunk.chunk_type == "content")
         elif search_in == "summary":
-            chunk_query = chunk_query.filter(NoteChunk.chunk_type == "summary")
+            user_chunks = user_chunks.filter(NoteChunk.chunk_type == "summary")
         # If "both", no filter needed
         
-        # Group by note_id and get the maximum similarity for each note
-        chunk_query = chunk_query.group_by(NoteChunk.note_id).having(
-            func.max(1 - func.cosine_distance(NoteChunk.embedding, embedding_vector)) >= similarity_threshold
-        ).order_by(
-            func.max(1 - func.cosine_distance(NoteChunk.embedding, embedding_vector)).desc()
-        ).limit(limit)
+        user_chunks = user_chunks.cte("user_chunks").prefix_with("MATERIALIZED")
         
-        # Execute chunk query to get note_ids with similarities
-        chunk_results = chunk_query.all()
+        # Keep the best-matching chunk per note; its text is returned as the snippet
+        best_chunks = db.query(user_chunks).filter(
+            user_chunks.c.similarity >= similarity_threshold
+        ).distinct(
+            user_chunks.c.note_id
+        ).order_by(
+            user_chunks.c.note_id,
+            user_chunks.c.similarity.desc()
+        ).subquery()
+        
+        # Fetch notes with their best chunk in the same statement, ordered by relevance
+        results = db.query(
+            Note,
+            best_chunks.c.similarity,
+            NoteChunk.chunk_text,
+            NoteChunk.chunk_type,
+            NoteChunk.start_char,
+            NoteChunk.end_char
+        ).join(
+            best_chunks, best_chunks.c.note_id == Note.id
+        ).join(
+            NoteChunk, NoteChunk.id == best_chunks.c.chunk_id
+        ).order_by(
+            best_chunks.c.similarity.desc()
+        ).limit(limit).all()
         
-        if not chunk_results:
+        if not results:
             logger.info("Semantic search found 0 notes for user %s", user_id)
             return ResponseCommon.success_response(
                 data={
@@ -758,20 +873,16 @@ def semantic_search_notes(
                 message="No relevant notes found"
             )
         
-        # Get the actual Note objects
-        note_ids = [result.note_id for result in chunk_results]
-        notes = db.query(Note).filter(Note.id.in_(note_ids)).all()
-        
-        # Create a mapping of note_id to similarity score
-        similarity_map = {result.note_id: float(result.max_similarity) for result in chunk_results}
-        
-        # Sort notes by similarity score and format results
         notes_with_scores = [
             {
                 "note": NoteSchema.model_validate(note),
-                "similarity_score": similarity_map[note.id]
+                "similarity_score": float(similarity),
+                "snippet": snippet,
+                # Offsets index the note's content for "content" chunks and the summary for "summary" chunks
+                "chunk_type": chunk_type,
+                "range": [start_char, end_char]
             }
-            for note in sorted(notes, key=lambda n: similarity_map[n.id], reverse=True)
+            for note, similarity, snippet, chunk_type, start_char, end_char in results
         ]
         
         logger.info(
@@ -1,18 +1,38 @@
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, List, Tuple
-from datetime import datetime, timezone
+import os
+import time
+from collections import defaultdict
+from typing import Final, Optional, Dict, List, Tuple
 
+import redis
 from firebase_admin import messaging
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import delete, desc, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.common.constants import CacheKeys
 from app.core.firebase_config import init_firebase
+from app.core.redis_config import REDIS_CLIENT
 from app.models.user_device_model import UserDevice
 from app.models.notification_model import Notification
 from app.schemas.notification import NotificationCreate
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of messages accepted by a single messaging.send_each call
+FCM_MAX_BATCH_SIZE = 500
+# Caps concurrent send_each batches so fan-outs don't exhaust the FCM connection pool
+FCM_MAX_CONCURRENT_BATCHES = 8
+_fcm_send_semaphore = asyncio.Semaphore(FCM_MAX_CONCURRENT_BATCHES)
+
+# Shared payload for notifications without data; never mutated
+_EMPTY_PAYLOAD: Final[Dict[str, str]] = {}
+
+# Window in which an identical notification (same user, type, related id, text and run) is dropped; 0 disables
+NOTIFICATION_DEDUP_TTL_SECONDS = int(os.getenv("NOTIFICATION_DEDUP_TTL_SECONDS", "7200"))
+
 
 class NotificationService:
     """Service for managing notifications and sending push notifications via FCM."""
@@ -23,22 +43,73 @@ class NotificationService:
     async def create_notification(
         db: Session,
         notification_data: NotificationCreate,
-    ) -> Notification:
-        """Create and store a notification in the database."""
-        notification = Notification(
-            user_id=notification_data.user_id,
-            title=notification_data.title,
-            body=notification_data.body,
-            notification_type=notification_data.notification_type,
-            related_id=notification_data.related_id,
-            data=notification_data.data,
+        run_id: Optional[str] = None,
+    ) -> Optional[Notification]:
+        """
+        Create and store a notification in the database.
+        Returns None if the same notification already exists in the current dedup window.
+        """
+        stmt = (
+            pg_insert(Notification)
+            .values(NotificationService._notification_row(notification_data, run_id))
+            .on_conflict_do_nothing(index_elements=[Notification.user_id, Notification.dedup_key])
+            .returning(Notification)
         )
-        db.add(notification)
+        notification = db.scalars(stmt).first()
         db.commit()
-        db.refresh(notification)
+        if notification is None:
+            logger.info("Duplicate notification for user %s not stored", notification_data.user_id)
+            return None
         logger.info("Created notification %s for user %s", notification.id, notification_data.user_id)
         return notification
 
+    @staticmethod
+    async def create_notifications_bulk(
+        db: Session,
+        notifications_data: List[NotificationCreate],
+    ) -> List[Tuple[int, int]]:
+        """
+        Store many notifications with a single INSERT ... RETURNING (fan-out paths).
+        Identical entries (same user, type, related id and text) are stored once per dedup window.
+        Returns (notification_id, user_id) pairs of the rows actually inserted.
+        """
+        rows = list({
+            (item.user_id, item.notification_type, item.related_id, item.title, item.body):
+                NotificationService._notification_row(item)
+            for item in notifications_data
+        }.values())
+        if not rows:
+            return []
+
+        result = db.execute(
+            pg_insert(Notification)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Notification.user_id, Notification.dedup_key])
+            .returning(Notification.id, Notification.user_id)
+        )
+        created = [(row.id, row.user_id) for row in result]
+        db.commit()
+        logger.info("Created %d notifications in bulk", len(created))
+        return created
+
+    @staticmethod
+    def _notification_row(notification_data: NotificationCreate, run_id: Optional[str] = None) -> Dict:
+        return {
+            "user_id": notification_data.user_id,
+            "title": notification_data.title,
+            "body": notification_data.body,
+            "notification_type": notification_data.notification_type,
+            "related_id": notification_data.related_id,
+            "data": notification_data.data,
+            "dedup_key": NotificationService._dedup_window_key(
+                notification_data.notification_type,
+                notification_data.related_id,
+                notification_data.title,
+                notification_data.body,
+                run_id,
+            ),
+        }
+
     @staticmethod
     async def send_and_store_notification(
         db: Session,
@@ -48,11 +119,27 @@ class NotificationService:
         notification_type: str,
         related_id: Optional[int] = None,
         data: Optional[Dict[str, str]] = None,
-    ) -> Tuple[Notification, Dict[str, int]]:
+        run_id: Optional[str] = None,
+    ) -> Tuple[Optional[Notification], Dict[str, int]]:
         """
         Create notification in DB and send push notification via FCM.
         Returns the notification object and FCM stats.
+        Identical notifications of the same run (e.g. the job id) within
+        NOTIFICATION_DEDUP_TTL_SECONDS are skipped (no DB row, no push) and
+        return (None, stats with duplicate=1).
         """
+        dedup_key = NotificationService._acquire_dedup_slot(
+            user_id, notification_type, related_id, title, body, run_id
+        )
+        if dedup_key is False:
+            logger.info(
+                "Skipping duplicate %s notification for user %s (related_id=%s)",
+                notification_type,
+                user_id,
+                related_id,
+            )
+            return None, {"total_devices": 0, "successful": 0, "failed": 0, "deactivated": 0, "duplicate": 1}
+
         # Store in database
         notification_data = NotificationCreate(
             user_id=user_id,
@@ -62,19 +149,93 @@ class NotificationService:
             related_id=related_id,
             data=data,
         )
-        notification = await NotificationService.create_notification(db, notification_data)
-
-        # Send push notification
-        fcm_stats = await NotificationService.send_to_user(
-            db=db,
-            user_id=user_id,
-            title=title,
-            body=body,
-            data=data,
-        )
+        notification = None
+        try:
+            notification = await NotificationService.create_notification(db, notification_data, run_id)
+            if notification is None:
+                # Another worker stored it first (e.g. Redis was unavailable); it owns the push
+                return None, {"total_devices": 0, "successful": 0, "failed": 0, "deactivated": 0, "duplicate": 1}
+
+            # Send push notification
+            fcm_stats = await NotificationService.send_to_user(
+                db=db,
+                user_id=user_id,
+                title=title,
+                body=body,
+                data=data,
+            )
+        except Exception:
+            # A stored row stays in the inbox even if the push failed; only the Redis slot is
+            # released, so the slot never outlives a notification that was not stored or sent
+            db.rollback()
+            NotificationService._release_dedup_slot(dedup_key)
+            raise
 
         return notification, fcm_stats
 
+    @staticmethod
+    def _acquire_dedup_slot(
+        user_id: int,
+        notification_type: str,
+        related_id: Optional[int],
+        title: str,
+        body: str,
+        run_id: Optional[str] = None,
+    ):
+        """
+        SET NX on a payload hash. Returns False if the same notification was sent recently,
+        otherwise the claimed key (None when nothing was claimed) for _release_dedup_slot.
+        """
+        if NOTIFICATION_DEDUP_TTL_SECONDS <= 0:
+            return None
+        digest = NotificationService._dedup_digest(notification_type, related_id, title, body, run_id)
+        cache_key = CacheKeys.NOTIFICATION_DEDUP.format(user_id=user_id, digest=digest)
+        try:
+            if not REDIS_CLIENT.set(cache_key, "1", nx=True, ex=NOTIFICATION_DEDUP_TTL_SECONDS):
+                return False
+            return cache_key
+        except redis.RedisError as e:
+            # Fail open: a duplicate push is better than a lost one
+            logger.warning("Failed to check notification dedup key for user %s: %s", user_id, str(e))
+            return None
+
+    @staticmethod
+    def _release_dedup_slot(cache_key: Optional[str]) -> None:
+        if not cache_key:
+            return
+        try:
+            REDIS_CLIENT.delete(cache_key)
+        except redis.RedisError as e:
+            logger.warning("Failed to release notification dedup key %s: %s", cache_key, str(e))
+
+    @staticmethod
+    def _dedup_digest(
+        notification_type: str,
+        related_id: Optional[int],
+        title: str,
+        body: str,
+        run_id: Optional[str] = None,
+    ) -> str:
+        payload = f"{notification_type}:{related_id}:{title}:{body}"
+        if run_id:
+            payload = f"{payload}:{run_id}"
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _dedup_window_key(
+        notification_type: str,
+        related_id: Optional[int],
+        title: str,
+        body: str,
+        run_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """Payload hash plus the current fixed dedup window; unique per user in the database."""
+        if NOTIFICATION_DEDUP_TTL_SECONDS <= 0:
+            return None
+        window = int(time.time()) // NOTIFICATION_DEDUP_TTL_SECONDS
+        digest = NotificationService._dedup_digest(notification_type, related_id, title, body, run_id)
+        return f"{digest}:{window}"
+
     @staticmethod
     def get_user_notifications(
         db: Session,
@@ -96,8 +257,22 @@ class NotificationService:
         if notification_type:
             query = query.filter(Notification.notification_type == notification_type)
 
-        # Get total count
-        total_count = query.count()
+        # Get paginated results with the filtered total as a window count (one round trip)
+        rows = (
+            query.add_columns(func.count().over().label("total"))
+            .order_by(desc(Notification.created_at))
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        notifications = [row[0] for row in rows]
+        if rows:
+            total_count = rows[0].total
+        elif skip > 0:
+            # Page past the end carries no window count; fall back to counting
+            total_count = query.count()
+        else:
+            total_count = 0
 
         # Get unread count
         unread_count = db.query(func.count(Notification.id)).filter(
@@ -105,9 +280,6 @@ class NotificationService:
             Notification.is_read == False
         ).scalar()
 
-        # Get paginated results
-        notifications = query.order_by(desc(Notification.created_at)).offset(skip).limit(limit).all()
-
         return notifications, total_count, unread_count or 0
 
     @staticmethod
@@ -131,8 +303,8 @@ class NotificationService:
         ).update(
             {
                 "is_read": True,
-                "read_at": datetime.now(timezone.utc),
-                "updated_at": datetime.now(timezone.utc)
+                "read_at": func.now(),
+                "updated_at": func.now()
             },
             synchronize_session=False
         )
@@ -149,8 +321,8 @@ class NotificationService:
         ).update(
             {
                 "is_read": True,
-                "read_at": datetime.now(timezone.utc),
-                "updated_at": datetime.now(timezone.utc)
+                "read_at": func.now(),
+                "updated_at": func.now()
             },
             synchronize_session=False
         )
@@ -161,13 +333,14 @@ class NotificationService:
     @staticmethod
     def delete_notification(db: Session, notification_id: int, user_id: int) -> bool:
         """Delete a notification if it belongs to the user."""
-        notification = db.query(Notification).filter(
-            Notification.id == notification_id,
-            Notification.user_id == user_id
-        ).first()
-        if notification:
-            db.delete(notification)
-            db.commit()
+        result = db.execute(
+            delete(Notification).where(
+                Notification.id == notification_id,
+                Notification.user_id == user_id
+            )
+        )
+        db.commit()
+        if result.rowcount:
             logger.info("Deleted notification %s for user %s", notification_id, user_id)
             return True
         return False
@@ -185,10 +358,10 @@ class NotificationService:
         """
         Send push notification to all active devices of a user.
         """
-        init_firebase()
+        app = init_firebase()
 
         devices = (
-            db.query(UserDevice)
+            db.query(UserDevice.id, UserDevice.fcm_token)
             .filter(UserDevice.user_id == user_id, UserDevice.is_active == True)
             .all()
         )
@@ -200,42 +373,134 @@ class NotificationService:
 
         notification = messaging.Notification(title=title, body=body)
         payload = NotificationService._coerce_data_payload(data)
-
-        for device in devices:
-            message = messaging.Message(
-                notification=notification,
-                token=device.fcm_token,
-                data=payload,
+        messages = [
+            messaging.Message(notification=notification, token=device.fcm_token, data=payload)
+            for device in devices
+        ]
+
+        deactivated_ids: List[int] = []
+        batches = await NotificationService._send_batches(messages, app)
+        for batch_index, batch in enumerate(batches):
+            start = batch_index * FCM_MAX_BATCH_SIZE
+            batch_devices = devices[start:start + FCM_MAX_BATCH_SIZE]
+            if isinstance(batch, BaseException):
+                logger.error("Failed to send notification batch for user %s: %s", user_id, batch)
+                stats["failed"] += len(batch_devices)
+                continue
+
+            for device, response in zip(batch_devices, batch.responses):
+                if response.success:
+                    stats["successful"] += 1
+                    logger.info("Notification sent to device %s: %s", device.id, response.message_id)
+                elif NotificationService._should_deactivate(device, response.exception):
+                    deactivated_ids.append(device.id)
+                    stats["deactivated"] += 1
+                else:
+                    stats["failed"] += 1
+
+        if deactivated_ids:
+            db.query(UserDevice).filter(UserDevice.id.in_(deactivated_ids)).update(
+                {"is_active": False},
+                synchronize_session=False
             )
-            try:
-                response = messaging.send(message)
-                stats["successful"] += 1
-                logger.info("Notification sent to device %s: %s", device.id, response)
-            except messaging.UnregisteredError:
-                logger.warning("Token %s unregistered. Deactivating device %s", device.fcm_token, device.id)
-                device.is_active = False
-                stats["deactivated"] += 1
-            except messaging.SenderIdMismatchError:
-                logger.error("Sender ID mismatch for token %s. Deactivating device %s", device.fcm_token, device.id)
-                device.is_active = False
-                stats["deactivated"] += 1
-            except messaging.QuotaExceededError:
-                logger.error("FCM quota exceeded for device %s", device.id)
-                stats["failed"] += 1
-            except messaging.InvalidArgumentError as exc:
-                logger.error("Invalid token for device %s: %s", device.id, exc)
-                device.is_active = False
-                stats["deactivated"] += 1
-            except Exception as exc:
-                logger.error("Unexpected error sending to device %s: %s", device.id, exc)
-                stats["failed"] += 1
-
-        if stats["deactivated"] > 0:
             db.commit()
 
         logger.info("Notification stats for user %s: %s", user_id, stats)
         return stats
 
+    @staticmethod
+    async def send_to_users_bulk(
+        db: Session,
+        user_ids: List[int],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, str]] = None,
+    ) -> Dict[int, Dict[str, int]]:
+        """
+        Send the same push notification to all active devices of many users.
+        Devices are loaded with one query and FCM batches span users.
+        Returns per-user stats keyed by user_id.
+        """
+        app = init_firebase()
+
+        devices = (
+            db.query(UserDevice.id, UserDevice.user_id, UserDevice.fcm_token)
+            .filter(UserDevice.user_id.in_(user_ids), UserDevice.is_active == True)
+            .all()
+        )
+
+        devices_by_user = defaultdict(list)
+        for device in devices:
+            devices_by_user[device.user_id].append(device)
+        stats_by_user = {
+            user_id: {
+                "total_devices": len(devices_by_user.get(user_id, ())),
+                "successful": 0,
+                "failed": 0,
+                "deactivated": 0,
+            }
+            for user_id in user_ids
+        }
+        if not devices:
+            logger.warning("No active devices found for %d users", len(stats_by_user))
+            return stats_by_user
+
+        notification = messaging.Notification(title=title, body=body)
+        payload = NotificationService._coerce_data_payload(data)
+        messages = [
+            messaging.Message(notification=notification, token=device.fcm_token, data=payload)
+            for device in devices
+        ]
+
+        deactivated_ids: List[int] = []
+        batches = await NotificationService._send_batches(messages, app)
+        for batch_index, batch in enumerate(batches):
+            start = batch_index * FCM_MAX_BATCH_SIZE
+            batch_devices = devices[start:start + FCM_MAX_BATCH_SIZE]
+            if isinstance(batch, BaseException):
+                logger.error("Failed to send notification batch of %d devices: %s", len(batch_devices), batch)
+                for device in batch_devices:
+                    stats_by_user[device.user_id]["failed"] += 1
+                continue
+
+            for device, response in zip(batch_devices, batch.responses):
+                stats = stats_by_user[device.user_id]
+                if response.success:
+                    stats["successful"] += 1
+                elif NotificationService._should_deactivate(device, response.exception):
+                    deactivated_ids.append(device.id)
+                    stats["deactivated"] += 1
+                else:
+                    stats["failed"] += 1
+
+        if deactivated_ids:
+            db.query(UserDevice).filter(UserDevice.id.in_(deactivated_ids)).update(
+                {"is_active": False},
+                synchronize_session=False
+            )
+            db.commit()
+
+        logger.info("Sent notification to %d devices across %d users", len(devices), len(stats_by_user))
+        return stats_by_user
+
+    @staticmethod
+    def _should_deactivate(device, exc: Exception) -> bool:
+        """Log a per-device send failure; return True if the token is dead and the device should be deactivated."""
+        if isinstance(exc, messaging.UnregisteredError):
+            logger.warning("Token %s unregistered. Deactivating device %s", device.fcm_token, device.id)
+            return True
+        if isinstance(exc, messaging.SenderIdMismatchError):
+            logger.error("Sender ID mismatch for token %s. Deactivating device %s", device.fcm_token, device.id)
+            return True
+        if isinstance(exc, messaging.QuotaExceededError):
+            logger.error("FCM quota exceeded for device %s", device.id)
+            return False
+        if isinstance(exc, messaging.InvalidArgumentError):
+            logger.error("Invalid token for device %s: %s", device.id, exc)
+            return True
+        logger.error("Unexpected error sending to device %s: %s", device.id, exc)
+        return False
+
     @staticmethod
     async def send_to_devices(
         tokens: List[str],
@@ -244,23 +509,49 @@ class NotificationService:
         data: Optional[Dict[str, str]] = None,
     ) -> List[str]:
         """Send notification to specific device tokens (without database)."""
-        init_firebase()
+        app = init_firebase()
         failed_tokens: List[str] = []
         notification = messaging.Notification(title=title, body=body)
         payload = NotificationService._coerce_data_payload(data)
-
-        for token in tokens:
-            message = messaging.Message(notification=notification, token=token, data=payload)
-            try:
-                messaging.send(message)
-            except Exception as exc:
-                logger.error("Failed to send to token %s: %s", token, exc)
-                failed_tokens.append(token)
+        messages = [messaging.Message(notification=notification, token=token, data=payload) for token in tokens]
+
+        batches = await NotificationService._send_batches(messages, app)
+        for batch_index, batch in enumerate(batches):
+            start = batch_index * FCM_MAX_BATCH_SIZE
+            batch_tokens = tokens[start:start + FCM_MAX_BATCH_SIZE]
+            if isinstance(batch, BaseException):
+                logger.error("Failed to send notification batch of %d tokens: %s", len(batch_tokens), batch)
+                failed_tokens.extend(batch_tokens)
+                continue
+
+            for token, response in zip(batch_tokens, batch.responses):
+                if not response.success:
+                    logger.error("Failed to send to token %s: %s", token, response.exception)
+                    failed_tokens.append(token)
 
         return failed_tokens
 
+    @staticmethod
+    async def _send_batches(messages: List[messaging.Message], app) -> list:
+        """
+        Send messages in FCM-sized batches on worker threads, several batches at a time.
+        Returns one BatchResponse (or the raised exception) per batch, in order.
+        """
+        async def _send(batch: List[messaging.Message]):
+            async with _fcm_send_semaphore:
+                return await asyncio.to_thread(messaging.send_each, batch, app=app)
+
+        return await asyncio.gather(
+            *(_send(messages[start:start + FCM_MAX_BATCH_SIZE]) for start in range(0, len(messages), FCM_MAX_BATCH_SIZE)),
+            return_exceptions=True,
+        )
+
     @staticmethod
     def _coerce_data_payload(data: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """FCM data values must be strings; None becomes "". Computed once per send, shared by all messages."""
         if not data:
-            return {}
-        return {str(key): "" if value is None else str(value) for key, value in data.items()}
+            return _EMPTY_PAYLOAD
+        return {
+            key if type(key) is str else str(key): value if type(value) is str else ("" if value is None else str(value))
+            for key, value in data.items()
+        }
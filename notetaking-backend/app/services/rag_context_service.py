@@ -2,9 +2,9 @@ from datetime import datetime
 import logging
 from typing import Optional
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func, cast
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import cast, func
+from pgvector.sqlalchemy import HALFVEC
 
 from app.models.note_chunk_model import NoteChunk
 from app.models.note_model import Note
@@ -13,6 +13,12 @@ from app.services.embedding_service import generate_query_embedding
 
 logger = logging.getLogger(__name__)
 
+# Rough characters-per-token ratio used to turn the token budget into a character budget
+_CHARS_PER_TOKEN = 4
+
+# One source block of the RAG prompt context: title, audio file name, date, chunk text
+_CONTEXT_CHUNK_TEMPLATE = "---\nNguồn: %s\nAudio: %s\nNgày: %s\nNội dung: %s\n---\n"
+
 
 class RAGContextService:
     """Service for building RAG context from user's content."""
@@ -31,93 +37,108 @@ class RAGContextService:
             logger.error("Failed to generate query embedding")
             return []
 
-        query_obj = (
-            db.query(NoteChunk)
-            .join(Note, NoteChunk.note_id == Note.id)
-            .outerjoin(AudioFile, Note.audio_file_id == AudioFile.id)
-            .filter(Note.user_id == user_id, Note.is_archived == False)
-        )
+        # Embeddings are L2-normalized, so <#> ranks like cosine distance
+        embedding_vector = cast(query_embedding, HALFVEC(768))
+        distance = NoteChunk.embedding.max_inner_product(embedding_vector)
 
+        filters = []
         date_range = entities.get("date_range") or {}
         start_date = self._parse_date(date_range.get("start"))
         end_date = self._parse_date(date_range.get("end"))
         if start_date:
-            query_obj = query_obj.filter(Note.created_at >= start_date)
+            filters.append(Note.created_at >= start_date)
         if end_date:
-            query_obj = query_obj.filter(Note.created_at <= end_date)
+            filters.append(Note.created_at <= end_date)
 
         categories = entities.get("categories") or []
         if categories:
-            query_obj = query_obj.filter(Note.category.in_(categories))
+            filters.append(Note.category.in_(categories))
 
         audio_ids = entities.get("audio_ids") or []
         if audio_ids:
-            query_obj = query_obj.filter(Note.audio_file_id.in_(audio_ids))
+            filters.append(Note.audio_file_id.in_(audio_ids))
 
         keywords = entities.get("keywords") or []
         if keywords:
-            pattern = f"%{' '.join(keywords)}%"
-            query_obj = query_obj.filter(NoteChunk.chunk_text.ilike(pattern))
+            # Must match the expression of the GIN index ix_note_chunks_chunk_text_fts
+            filters.append(
+                func.to_tsvector("simple", NoteChunk.chunk_text).op("@@")(
+                    func.plainto_tsquery("simple", " ".join(keywords))
+                )
+            )
+
+        # Stage 1: the user's active chunks, narrowed by the entity filters, ranked exactly.
+        # Ranking with the HNSW index would filter its global top-K (other users' chunks and
+        # non-matching ones included) and could leave nothing. MATERIALIZED keeps the planner
+        # from pushing the ORDER BY back onto that index.
+        candidates = (
+            db.query(NoteChunk.id.label("chunk_id"), distance.label("distance"))
+            .join(Note, NoteChunk.note_id == Note.id)
+            .filter(Note.user_id == user_id, Note.is_archived == False, *filters)
+            .cte("user_chunks")
+            .prefix_with("MATERIALIZED")
+        )
 
-        # Cast embedding to vector type for pgvector cosine_distance function
-        embedding_vector = cast(query_embedding, Vector(768))
-        
+        # Stage 2: load the candidate chunks with their note/audio file
         chunks = (
-            query_obj.order_by(func.cosine_distance(NoteChunk.embedding, embedding_vector))
+            db.query(NoteChunk)
+            .join(candidates, candidates.c.chunk_id == NoteChunk.id)
+            .join(Note, NoteChunk.note_id == Note.id)
+            .outerjoin(AudioFile, Note.audio_file_id == AudioFile.id)
+            # Populate chunk.note / note.audio_file from the joins above (no lazy loads per chunk)
+            .options(contains_eager(NoteChunk.note).contains_eager(Note.audio_file))
+            .order_by(candidates.c.distance)
             .limit(limit)
             .all()
         )
 
         return chunks
 
-    def build_context(self, chunks: list, max_tokens: int = 3000) -> str:
+    @staticmethod
+    def build_context(chunks: list, max_tokens: int = 3000) -> str:
         """Build context string from chunks, respecting token limit."""
-        max_chars = max_tokens * 4
+        max_chars = max_tokens * _CHARS_PER_TOKEN
         context_parts = []
         total_chars = 0
 
         for chunk in chunks:
             note = chunk.note
-            audio_name = note.audio_file.original_filename if note.audio_file else "N/A"
-            chunk_text = (
-                "---\n"
-                f"Nguồn: {note.title}\n"
-                f"Audio: {audio_name}\n"
-                f"Ngày: {note.created_at.strftime('%Y-%m-%d')}\n"
-                f"Nội dung: {chunk.chunk_text}\n"
-                "---\n"
+            audio_file = note.audio_file
+            chunk_text = _CONTEXT_CHUNK_TEMPLATE % (
+                note.title,
+                audio_file.original_filename if audio_file else "N/A",
+                note.created_at.strftime("%Y-%m-%d"),
+                chunk.chunk_text,
             )
-            if total_chars + len(chunk_text) > max_chars:
+            total_chars += len(chunk_text)
+            if total_chars > max_chars:
                 break
             context_parts.append(chunk_text)
-            total_chars += len(chunk_text)
 
         return "\n".join(context_parts)
 
-    def get_related_audio_files(self, chunks: list) -> list:
-        """Extract unique audio files from chunks."""
-        audio_files = []
-        seen_ids = set()
-        for chunk in chunks:
-            if chunk.note.audio_file and chunk.note.audio_file.id not in seen_ids:
-                audio_files.append(chunk.note.audio_file)
-                seen_ids.add(chunk.note.audio_file.id)
-        return audio_files
-
-    def get_related_notes(self, chunks: list) -> list:
-        """Extract unique notes from chunks."""
-        notes = []
-        seen_ids = set()
-        for chunk in chunks:
-            if chunk.note.id not in seen_ids:
-                notes.append(chunk.note)
-                seen_ids.add(chunk.note.id)
-        return notes
-
-    def _parse_date(self, value: Optional[str]) -> Optional[datetime]:
+    @staticmethod
+    def get_related_audio_files(chunks: list) -> list:
+        """Extract unique audio files from chunks, in first-seen order."""
+        return list({
+            chunk.note.audio_file_id: chunk.note.audio_file
+            for chunk in chunks
+            if chunk.note.audio_file_id is not None and chunk.note.audio_file is not None
+        }.values())
+
+    @staticmethod
+    def get_related_notes(chunks: list) -> list:
+        """Extract unique notes from chunks, in first-seen order."""
+        return list({chunk.note_id: chunk.note for chunk in chunks}.values())
+
+    @staticmethod
+    def _parse_date(value: Optional[str]) -> Optional[datetime]:
         if not value:
             return None
         try:
+            # Entity extraction almost always yields a bare YYYY-MM-DD
+            if len(value) == 10 and value[4] == "-" and value[7] == "-":
+                return datetime(int(value[:4]), int(value[5:7]), int(value[8:]))
             return datetime.fromisoformat(value)
         except ValueError:
             return None
@@ -1,16 +1,52 @@
-import uuid
+import hashlib
 import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+import redis
+from arq.constants import result_key_prefix
 from fastapi import Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import func, or_, update
 
+from app.common.constants import CacheKeys
 from app.common.response_common import ResponseCommon
 from app.common.pagination_utils import PaginationHelper
 from app.models.task_job_model import TaskJob
 from app.schemas.pagination import PageDto
 from app.schemas.task_job import TaskSearchDto, TaskJobResponse
+from app.core.redis_config import REDIS_CLIENT
+
+logger = logging.getLogger(__name__)
+
+# A request with a dedup_key joins an existing job in one of these states instead of queueing again
+ACTIVE_TASK_STATUSES = ("pending", "queued", "processing")
+# Jobs left active longer than this (worker killed mid-job, or an arq job lost before a worker
+# picked it up) are marked failed, and a dedup_key request re-runs them instead of joining them
+STUCK_JOB_TIMEOUT = timedelta(hours=2)
+
+
+def _is_stale(job: TaskJob) -> bool:
+    updated_at = job.updated_at
+    if updated_at is None:
+        return False
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at < datetime.now(timezone.utc) - STUCK_JOB_TIMEOUT
+
+
+def _existing_job_response(job: TaskJob) -> ResponseCommon:
+    return ResponseCommon.success_response(
+        data={
+            "job_id": job.id,
+            "task_type": job.task_type,
+            "status": job.status,
+        },
+        message="Task already queued. Use job_id to check status.",
+    )
 
 
 class TaskJobService:
@@ -25,28 +61,71 @@ class TaskJobService:
         user_id: int,
         audio_id: Optional[int] = None,
         metadata: Optional[dict] = None,
+        dedup_key: Optional[str] = None,
+        batch_queue: Optional[str] = None,
         **kwargs,
     ) -> ResponseCommon:
-        """Create a task job record and enqueue it to the ARQ worker."""
+        """
+        Create a task job record and enqueue it to the ARQ worker.
+
+        With a dedup_key (natural key of the request, e.g. "summarize:<user_id>:<audio_id>")
+        the job id is derived from it, so repeating the request while the job is still active
+        returns that job instead of running the work twice. Finished jobs are re-run.
+
+        With a batch_queue (Redis list key) the job is pushed there for the worker to complete
+        together with others instead of as its own arq job; task_function is used only if
+        the push fails.
+        """
         if request is None or not hasattr(request.app.state, "arq_pool"):
             return ResponseCommon.error_response(
                 message="ARQ pool not initialized",
                 code=500,
             )
+        arq_pool = request.app.state.arq_pool
 
+        # Inserted as "queued" in one write: the worker loads this row as soon as it picks
+        # the job up, so it must exist before enqueue_job returns
         try:
-            job_id = str(uuid.uuid4())
-            new_job = TaskJob(
-                id=job_id,
-                task_type=task_type,
-                status="pending",
-                user_id=user_id,
-                audio_id=audio_id,
-                metadata_json=metadata,
-            )
-            db.add(new_job)
-            db.commit()
-            db.refresh(new_job)
+            if dedup_key:
+                job_id = hashlib.sha256(dedup_key.encode("utf-8")).hexdigest()[:32]
+                existing_job = db.query(TaskJob).filter(TaskJob.id == job_id).first()
+            else:
+                job_id = str(uuid.uuid4())
+                existing_job = None
+
+            if existing_job is None:
+                db.add(
+                    TaskJob(
+                        id=job_id,
+                        task_type=task_type,
+                        status="queued",
+                        user_id=user_id,
+                        audio_id=audio_id,
+                        metadata_json=metadata,
+                    )
+                )
+                db.commit()
+            elif existing_job.status in ACTIVE_TASK_STATUSES and not _is_stale(existing_job):
+                return _existing_job_response(existing_job)
+            else:
+                existing_job.status = "queued"
+                existing_job.result = None
+                existing_job.error_message = None
+                existing_job.metadata_json = metadata
+                db.commit()
+                # ARQ refuses a job id whose previous result it still keeps; the previous
+                # run's in-flight status must not show through the new queued row either
+                await arq_pool.delete(
+                    result_key_prefix + job_id,
+                    CacheKeys.TASK_JOB_STATUS.format(job_id=job_id),
+                )
+        except IntegrityError:
+            # A concurrent request with the same dedup_key created the job first
+            db.rollback()
+            existing_job = db.query(TaskJob).filter(TaskJob.id == job_id).first()
+            if existing_job is None:
+                return ResponseCommon.error_response(message="Failed to create task job", code=500)
+            return _existing_job_response(existing_job)
         except Exception as exc:
             db.rollback()
             return ResponseCommon.error_response(
@@ -60,19 +139,29 @@ class TaskJobService:
             job_kwargs["audio_id"] = audio_id
 
         try:
-            await request.app.state.arq_pool.enqueue_job(
-                task_function,
-                job_id,
-                **job_kwargs,
-                _job_id=job_id,
-            )
-            new_job.status = "queued"
-            db.commit()
+            pushed = False
+            if batch_queue:
+                try:
+                    await arq_pool.rpush(batch_queue, json.dumps({"job_id": job_id, **job_kwargs}))
+                    pushed = True
+                except redis.RedisError as e:
+                    logger.warning(
+                        "Failed to push job %s to %s, enqueueing it alone: %s", job_id, batch_queue, str(e)
+                    )
+            if not pushed:
+                # Returns None if ARQ already holds this job id; the queued row stays valid
+                await arq_pool.enqueue_job(
+                    task_function,
+                    job_id,
+                    **job_kwargs,
+                    _job_id=job_id,
+                )
         except Exception as exc:
-            db.rollback()
             try:
-                new_job.status = "failed"
-                new_job.error_message = str(exc)
+                db.query(TaskJob).filter(TaskJob.id == job_id).update(
+                    {"status": "failed", "error_message": str(exc)},
+                    synchronize_session=False,
+                )
                 db.commit()
             except Exception:
                 db.rollback()
@@ -107,12 +196,11 @@ class TaskJobService:
         query = db.query(TaskJob).filter(TaskJob.user_id == user_id)
 
         if search_dto.search:
-            search_term = f"%{search_dto.search}%"
             query = query.filter(
                 or_(
-                    TaskJob.task_type.ilike(search_term),
-                    TaskJob.status.ilike(search_term),
-                    TaskJob.id.ilike(search_term),
+                    TaskJob.search_vector.op("@@")(func.plainto_tsquery("simple", search_dto.search)),
+                    # Partial job ids are typed from the start, so an anchored prefix is enough
+                    TaskJob.id.startswith(search_dto.search, autoescape=True),
                 )
             )
 
@@ -158,21 +246,23 @@ class TaskJobService:
             if not job:
                 return ResponseCommon.error_response(message="Job not found", code=404)
 
-            # Parse result from JSON string to dict if present
-            result_data = None
-            if job.result:
+            job_status = job.status
+            if job_status in ACTIVE_TASK_STATUSES:
+                # Workers keep in-flight transitions in Redis; the row only gets terminal states
                 try:
-                    result_data = json.loads(job.result)
-                except (json.JSONDecodeError, TypeError):
-                    # If parsing fails, return as-is
-                    result_data = job.result
+                    job_status = (
+                        REDIS_CLIENT.hget(CacheKeys.TASK_JOB_STATUS.format(job_id=job.id), "status")
+                        or job_status
+                    )
+                except redis.RedisError as e:
+                    logger.warning("Failed to read in-flight status for job %s: %s", job.id, str(e))
 
             return ResponseCommon.success_response(
                 data={
                     "job_id": job.id,
                     "task_type": job.task_type,
-                    "status": job.status,
-                    "result": result_data,
+                    "status": job_status,
+                    "result": job.result,
                     "error_message": job.error_message,
                     "created_at": job.created_at,
                     "updated_at": job.updated_at,
@@ -186,5 +276,21 @@ class TaskJobService:
                 code=500,
             )
 
+    def fail_stuck_jobs(self, db: Session) -> int:
+        """Mark jobs stuck in an active status as failed; returns how many were updated."""
+        timeout = datetime.now(timezone.utc) - STUCK_JOB_TIMEOUT
+        # One UPDATE for all stuck rows, served by ix_task_jobs_active_updated. "queued" rows
+        # are included: one whose arq job expired or was flushed from Redis never runs
+        result = db.execute(
+            update(TaskJob)
+            .where(TaskJob.status.in_(ACTIVE_TASK_STATUSES), TaskJob.updated_at < timeout)
+            .values(
+                status="failed",
+                error_message="Job timeout - exceeded maximum processing time",
+            )
+        )
+        db.commit()
+        return result.rowcount
+
 
 task_job_service = TaskJobService()
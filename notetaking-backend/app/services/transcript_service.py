@@ -1,14 +1,20 @@
+import asyncio
 import os
 import io
-from typing import Optional, Dict, Any
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, BinaryIO, List, Tuple, Union
 from pathlib import Path
+from types import MappingProxyType
 import logging
+from functools import lru_cache
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 try:
     from google.cloud import speech_v1 as speech
     from google.cloud import storage
+    from requests.adapters import HTTPAdapter  # transport used by google-cloud-storage
     from google.api_core import exceptions as gcp_exceptions
     from google.api_core import retry as gcp_retry
     GOOGLE_CLOUD_AVAILABLE = True
@@ -18,13 +24,16 @@ except ImportError:
     storage = None
     gcp_exceptions = None
     gcp_retry = None
+    HTTPAdapter = None
 
 try:
     from pydub import AudioSegment
+    from pydub.utils import mediainfo
     PYDUB_AVAILABLE = True
 except ImportError:
     PYDUB_AVAILABLE = False
     AudioSegment = None
+    mediainfo = None
 
 from app.models import AudioFile
 from app.common.common_message import CommonMessage
@@ -32,6 +41,144 @@ from app.common.response_common import ResponseCommon
 
 logger = logging.getLogger(__name__)
 
+# GCS resumable upload chunks must be a multiple of 256 KiB
+GCS_CHUNK_SIZE_MULTIPLE = 256 * 1024
+GCS_SMALL_UPLOAD_MAX_BYTES = 16 * 1024 * 1024
+# google-cloud-storage sends objects up to this size (when the size is known) as a single request
+GCS_MULTIPART_MAX_BYTES = 8 * 1024 * 1024
+# Connections kept alive to storage.googleapis.com by the shared Storage client
+GCS_HTTP_POOL_SIZE = int(os.getenv("GCS_HTTP_POOL_SIZE", "32"))
+
+# Audio longer than this is split into <1 minute segments sent to recognize() concurrently
+# instead of one long_running_recognize call; 0 workers disables the segmented path
+SEGMENTED_TRANSCRIPTION_MIN_SECONDS = 600
+TRANSCRIBE_MAX_PARALLEL_SEGMENTS = int(os.getenv("TRANSCRIBE_MAX_PARALLEL_SEGMENTS", "8"))
+# recognize() accepts at most 60s of audio. Cuts sit near every SEGMENT_STEP_MS, at the
+# quietest point of the SEGMENT_CUT_SEARCH_MS before it, so no segment exceeds SEGMENT_MAX_MS
+SEGMENT_MAX_MS = 55_000
+SEGMENT_CUT_SEARCH_MS = 5_000
+SEGMENT_STEP_MS = SEGMENT_MAX_MS - SEGMENT_CUT_SEARCH_MS
+SEGMENT_CUT_STEP_MS = 100
+
+# Transcription-upload deletes run here instead of blocking the request on a GCS round trip
+_gcs_cleanup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gcs-cleanup")
+
+
+# Shared, read-only language entries returned by get_supported_languages
+SUPPORTED_LANGUAGES = tuple(
+    MappingProxyType({"code": code, "name": name})
+    for code, name in (
+        ("en-US", "English (US)"),
+        ("en-GB", "English (UK)"),
+        ("vi-VN", "Vietnamese"),
+        ("es-ES", "Spanish"),
+        ("fr-FR", "French"),
+        ("de-DE", "German"),
+        ("ja-JP", "Japanese"),
+        ("ko-KR", "Korean"),
+        ("zh-CN", "Chinese (Simplified)"),
+        ("pt-BR", "Portuguese (Brazil)"),
+    )
+)
+
+
+def probe_duration(file_path: str) -> float:
+    """Audio duration in seconds from the container headers via ffprobe (no decode)."""
+    output = subprocess.check_output(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", file_path],
+        timeout=30,
+    )
+    return float(output.strip())
+
+
+def _read_pcm(file_path: str, start_ms: int, length_ms: int) -> bytes:
+    """Decode [start_ms, start_ms + length_ms) as 16kHz mono 16-bit PCM; ffmpeg seeks, nothing else is decoded."""
+    return subprocess.check_output(
+        [
+            "ffmpeg", "-v", "error", "-ss", f"{start_ms / 1000:.3f}", "-t", f"{length_ms / 1000:.3f}",
+            "-i", file_path, "-ac", "1", "-ar", "16000", "-f", "s16le", "-",
+        ],
+        timeout=120,
+    )
+
+
+def _quietest_cut(file_path: str, window_end_ms: int) -> int:
+    """Quietest SEGMENT_CUT_STEP_MS step in the SEGMENT_CUT_SEARCH_MS before window_end_ms."""
+    search_start = window_end_ms - SEGMENT_CUT_SEARCH_MS
+    window = AudioSegment(
+        data=_read_pcm(file_path, search_start, SEGMENT_CUT_SEARCH_MS),
+        sample_width=2,
+        frame_rate=16000,
+        channels=1,
+    )
+    offset = min(
+        range(0, SEGMENT_CUT_SEARCH_MS, SEGMENT_CUT_STEP_MS),
+        key=lambda t: window[t:t + SEGMENT_CUT_STEP_MS].rms,
+    )
+    return search_start + offset
+
+
+def _segment_bounds(file_path: str, total_ms: int, executor) -> List[Tuple[int, int]]:
+    """(start_ms, end_ms) windows of at most SEGMENT_MAX_MS, cut where the audio is quietest."""
+    # Each cut only looks at its own search window, so they are found in parallel
+    window_ends = range(SEGMENT_MAX_MS, total_ms, SEGMENT_STEP_MS)
+    cuts = list(executor.map(lambda end: _quietest_cut(file_path, end), window_ends))
+    edges = [0, *cuts, total_ms]
+    return list(zip(edges, edges[1:]))
+
+
+@lru_cache(maxsize=64)
+def _audio_config(file_extension: str, language_code: str):
+    """Recognition config for direct transcription, built once per (extension, language)."""
+    # Default config for WAV files
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=16000,  # We convert to 16kHz
+        language_code=language_code,
+        enable_automatic_punctuation=True,
+        enable_word_confidence=True,
+        max_alternatives=1,
+    )
+
+    if file_extension in ['.mp3']:
+        config.encoding = speech.RecognitionConfig.AudioEncoding.MP3
+    elif file_extension in ['.flac']:
+        config.encoding = speech.RecognitionConfig.AudioEncoding.FLAC
+    elif file_extension in ['.ogg']:
+        config.encoding = speech.RecognitionConfig.AudioEncoding.OGG_OPUS
+
+    return config
+
+
+@lru_cache(maxsize=16)
+def _long_audio_config(language_code: str):
+    """Recognition config for long-running GCS transcription, built once per language."""
+    return speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=16000,
+        language_code=language_code,
+        enable_automatic_punctuation=True,
+        enable_word_time_offsets=True,
+        model="latest_long",  # Use the latest long-form model
+    )
+
+
+def _word_timings(alternative, offset: float = 0.0) -> List[Dict[str, Any]]:
+    """Word list for one recognition alternative, with times shifted by offset seconds."""
+    # Read the raw protobuf: proto-plus would wrap every word and build a timedelta per Duration
+    words = []
+    append = words.append
+    for word_info in type(alternative).pb(alternative).words:
+        start, end = word_info.start_time, word_info.end_time
+        append({
+            "word": word_info.word,
+            "start_time": offset + start.seconds + start.nanos * 1e-9,
+            "end_time": offset + end.seconds + end.nanos * 1e-9,
+            "confidence": word_info.confidence
+        })
+    return words
+
+
 class TranscriptService:
     def __init__(self):
         self.client = None
@@ -63,6 +210,10 @@ class TranscriptService:
             # Initialize Storage client if bucket is configured
             if self.gcs_bucket_name:
                 self.storage_client = storage.Client()
+                # requests' default pool keeps 10 connections per host; size it for concurrent
+                # uploads so parallel transcriptions reuse TLS connections instead of reconnecting
+                adapter = HTTPAdapter(pool_connections=GCS_HTTP_POOL_SIZE, pool_maxsize=GCS_HTTP_POOL_SIZE)
+                self.storage_client._http.mount("https://", adapter)
                 print(f"Google Cloud Storage client initialized successfully for bucket: {self.gcs_bucket_name}")
             else:
                 print("Warning: GCS_BUCKET_NAME not set. Long audio transcription will be limited.")
@@ -80,15 +231,32 @@ class TranscriptService:
         """Check if Google Cloud Storage is available for long audio files."""
         return self.storage_client is not None and self.gcs_bucket_name is not None
 
-    def upload_to_gcs(self, local_file_path: str, gcs_file_name: str) -> str:
-        """Upload a file to Google Cloud Storage and return the GCS URI."""
+    def upload_to_gcs(self, source: Union[str, BinaryIO], gcs_file_name: str) -> str:
+        """
+        Upload a local file path or a binary stream (read from its current position)
+        to Google Cloud Storage and return the GCS URI.
+        """
         if not self.is_gcs_available():
             raise Exception("Google Cloud Storage not available. Configure GCS_BUCKET_NAME and credentials.")
         
         try:
             bucket = self.storage_client.bucket(self.gcs_bucket_name)
             blob = bucket.blob(gcs_file_name)
-            blob.chunk_size = 8 * 1024 * 1024
+
+            if isinstance(source, (str, os.PathLike)):
+                upload_size = os.path.getsize(source)
+            else:
+                position = source.tell()
+                upload_size = source.seek(0, io.SEEK_END) - position
+                source.seek(position)
+            # Uploads up to GCS_MULTIPART_MAX_BYTES go out as one multipart request with no
+            # chunk buffer at all; medium ones get a buffer just big enough for the object;
+            # large ones use the library default chunk size (16 MiB)
+            if GCS_MULTIPART_MAX_BYTES < upload_size <= GCS_SMALL_UPLOAD_MAX_BYTES:
+                blob.chunk_size = max(
+                    GCS_CHUNK_SIZE_MULTIPLE,
+                    -(-upload_size // GCS_CHUNK_SIZE_MULTIPLE) * GCS_CHUNK_SIZE_MULTIPLE,
+                )
 
             upload_timeout = 600
             retry = None
@@ -99,11 +267,19 @@ class TranscriptService:
                 )
 
             # Upload the file
-            blob.upload_from_filename(
-                local_file_path,
-                timeout=upload_timeout,
-                retry=retry,
-            )
+            if isinstance(source, (str, os.PathLike)):
+                blob.upload_from_filename(
+                    source,
+                    timeout=upload_timeout,
+                    retry=retry,
+                )
+            else:
+                blob.upload_from_file(
+                    source,
+                    size=upload_size,  # without a size the library always uses a resumable session
+                    timeout=upload_timeout,
+                    retry=retry,
+                )
             
             gcs_uri = f"gs://{self.gcs_bucket_name}/{gcs_file_name}"
             logger.info(f"File uploaded to GCS: {gcs_uri}")
@@ -123,14 +299,7 @@ class TranscriptService:
             audio = speech.RecognitionAudio(uri=gcs_uri)
             
             # Configure recognition settings
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=16000,
-                language_code=language_code,
-                enable_automatic_punctuation=True,
-                enable_word_time_offsets=True,
-                model="latest_long",  # Use the latest long-form model
-            )
+            config = speech.RecognitionConfig(_long_audio_config(language_code))
             
             logger.info(f"Starting long-running transcription for: {gcs_uri}")
             
@@ -142,7 +311,8 @@ class TranscriptService:
             response = operation.result(timeout=7200)
             
             # Process results
-            full_transcript = ""
+            transcript_parts = []
+            word_count = 0
             confidence_scores = []
             transcriptions = []
             
@@ -152,7 +322,8 @@ class TranscriptService:
                     transcript_part = alternative.transcript
                     confidence = alternative.confidence
                     
-                    full_transcript += transcript_part + " "
+                    transcript_parts.append(transcript_part)
+                    word_count += len(transcript_part.split())
                     confidence_scores.append(confidence)
                     
                     # Add to segments for compatibility
@@ -165,14 +336,14 @@ class TranscriptService:
             # Calculate average confidence
             avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
             
-            full_transcript = full_transcript.strip()
+            full_transcript = " ".join(transcript_parts).strip()
             
             return {
                 "transcript": full_transcript,
                 "confidence": avg_confidence,
                 "language_code": language_code,
                 "segments": transcriptions,
-                "word_count": len(full_transcript.split()) if full_transcript else 0,
+                "word_count": word_count,
                 "duration_transcribed": None,  # Duration not directly available from GCS transcription
                 "status": "completed",
                 "method": "long_running_recognize_gcs"
@@ -182,58 +353,133 @@ class TranscriptService:
             logger.error(f"Long-running transcription failed: {e}")
             raise Exception(f"Long-running transcription failed: {e}")
 
-    def convert_audio_for_transcription(self, input_file: str, output_file: str) -> bool:
-        """Convert audio to format suitable for Google Cloud Speech"""
+    def transcribe_segments(self, file_path: str, duration: float, language_code: str = "en-US") -> Dict[str, Any]:
+        """
+        Transcribe a long audio file as <1 minute windows with concurrent recognize() calls.
+        Each window is decoded on its own with ffmpeg, so the whole recording is never held in memory.
+        Segments are merged in order, with word times shifted by each window's start.
+        """
+        if not self.is_transcription_available():
+            raise Exception("Google Cloud Speech API not available")
+
+        # Raw 16kHz mono PCM as produced by _read_pcm, with the long-running path's model and word offsets
+        config = _long_audio_config(language_code)
+
+        def _recognize(bound: Tuple[int, int]):
+            start_ms, end_ms = bound
+            pcm = _read_pcm(file_path, start_ms, end_ms - start_ms)
+            if not pcm:
+                # The stored duration overshot the actual audio
+                return None
+            return self.client.recognize(
+                config=config,
+                audio=speech.RecognitionAudio(content=pcm),
+            )
+
+        with ThreadPoolExecutor(max_workers=TRANSCRIBE_MAX_PARALLEL_SEGMENTS) as executor:
+            bounds = _segment_bounds(file_path, int(duration * 1000), executor)
+            logger.info(f"Transcribing {len(bounds)} segments with up to {TRANSCRIBE_MAX_PARALLEL_SEGMENTS} in parallel")
+            responses = list(executor.map(_recognize, bounds))
+
+        transcriptions = []
+        word_count = 0
+        overall_confidence = 0.0
+        for (start_ms, _), response in zip(bounds, responses):
+            if response is None:
+                continue
+            offset = start_ms / 1000.0
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                transcriptions.append({
+                    "transcript": alternative.transcript,
+                    "confidence": alternative.confidence,
+                    "words": _word_timings(alternative, offset)
+                })
+                word_count += len(alternative.transcript.split())
+                overall_confidence += alternative.confidence
+
+        if transcriptions:
+            overall_confidence /= len(transcriptions)
+
+        return {
+            "transcript": " ".join(t["transcript"] for t in transcriptions),
+            "confidence": overall_confidence,
+            "language_code": language_code,
+            "segments": transcriptions,
+            "word_count": word_count,
+            "duration_transcribed": bounds[-1][1] / 1000.0,
+            "status": "completed",
+            "method": "parallel_segmented_recognize"
+        }
+
+    def is_transcription_ready(self, input_file: str) -> bool:
+        """True if the file is already 16kHz mono 16-bit PCM, i.e. conversion would be a no-op"""
+        if not PYDUB_AVAILABLE:
+            return False
+        try:
+            # ffprobe reads the stream headers only; nothing is decoded
+            info = mediainfo(input_file)
+            return (
+                info.get("codec_name") == "pcm_s16le"
+                and int(info.get("sample_rate", 0)) == 16000
+                and int(info.get("channels", 0)) == 1
+            )
+        except Exception as e:
+            logger.warning(f"Could not probe audio format: {e}")
+            return False
+
+    def convert_audio_for_transcription(self, input_file: str, output_file: Union[str, BinaryIO]) -> bool:
+        """Convert audio to format suitable for Google Cloud Speech (output to a path or binary stream)"""
         if not PYDUB_AVAILABLE:
             logger.warning("pydub not available. Audio conversion skipped.")
             return False
             
         try:
-            # Load audio file
-            audio = AudioSegment.from_file(input_file)
+            # Load audio file; ffmpeg downmixes and resamples while decoding, so only the
+            # mono 16kHz PCM is ever held in memory (not the full-rate stereo decode)
+            audio = AudioSegment.from_file(input_file, parameters=["-ac", "1", "-ar", "16000"])
             
-            # Convert to mono, 16kHz, WAV format (optimal for Google Cloud Speech)
+            # Convert to mono, 16kHz, WAV format (optimal for Google Cloud Speech); no-ops after the decode above
             audio = audio.set_channels(1)  # Mono
             audio = audio.set_frame_rate(16000)  # 16kHz sample rate
             
             # Export as WAV
             audio.export(output_file, format="wav")
-            logger.info(f"Audio converted successfully: {output_file}")
+            logger.info(f"Audio converted successfully: {input_file}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to convert audio: {e}")
             return False
 
-    def get_audio_config(self, file_path: str) -> speech.RecognitionConfig:
+    def get_audio_config(self, file_path: str, language_code: str = "en-US") -> speech.RecognitionConfig:
         """Get appropriate recognition config based on audio file"""
-        
-        # Default config for WAV files
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,  # We convert to 16kHz
-            language_code="en-US",  # Default to English
-            enable_automatic_punctuation=True,
-            enable_word_confidence=True,
-            max_alternatives=1,
-        )
-        
-        # You can add more sophisticated format detection here
-        file_extension = Path(file_path).suffix.lower()
-        
-        if file_extension in ['.mp3']:
-            config.encoding = speech.RecognitionConfig.AudioEncoding.MP3
-        elif file_extension in ['.flac']:
-            config.encoding = speech.RecognitionConfig.AudioEncoding.FLAC
-        elif file_extension in ['.ogg']:
-            config.encoding = speech.RecognitionConfig.AudioEncoding.OGG_OPUS
-            
-        return config
+        # Copy of the cached config, so callers may mutate it
+        return speech.RecognitionConfig(_audio_config(Path(file_path).suffix.lower(), language_code))
+
+    def delete_from_gcs_later(self, gcs_file_name: str) -> None:
+        """Delete an uploaded object in the background so the caller doesn't wait on GCS."""
+        blob = self.storage_client.bucket(self.gcs_bucket_name).blob(gcs_file_name)
+        gcs_uri = f"gs://{self.gcs_bucket_name}/{gcs_file_name}"
+
+        def _log_result(future):
+            cleanup_error = future.exception()
+            if cleanup_error is not None:
+                logger.warning(f"Failed to cleanup GCS file {gcs_uri}: {cleanup_error}")
+            else:
+                logger.info(f"Cleaned up GCS file: {gcs_uri}")
 
-    def estimate_duration_from_file_size(self, file_path: str, format: str) -> Optional[float]:
+        _gcs_cleanup_executor.submit(blob.delete).add_done_callback(_log_result)
+
+    def estimate_duration_from_file_size(
+        self, file_path: str, format: str, file_size: Optional[int] = None
+    ) -> Optional[float]:
         """Estimate duration based on file size (rough approximation)"""
         try:
-            file_size = os.path.getsize(file_path)
+            if file_size is None:
+                file_size = os.path.getsize(file_path)
             
             # Rough estimates based on typical bitrates (very approximate)
             bitrate_estimates = {
@@ -272,7 +518,10 @@ class TranscriptService:
                 detail=CommonMessage.TRANSCRIPTION_SERVICE_UNAVAILABLE
             )
         
-        if not os.path.exists(audio_file.file_path):
+        # One stat serves both the existence check and the size decisions below
+        try:
+            original_size = os.stat(audio_file.file_path).st_size
+        except FileNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=CommonMessage.AUDIO_FILE_NOT_FOUND_ON_DISK
@@ -281,39 +530,57 @@ class TranscriptService:
         try:
             # Prepare file for transcription
             original_file = audio_file.file_path
-            converted_file = None
-            
-            # Convert audio if needed (for better recognition)
-            if PYDUB_AVAILABLE and audio_file.format.lower() in ['mp3', 'm4a', 'aac']:
-                converted_file = f"{original_file}_converted.wav"
-                if self.convert_audio_for_transcription(original_file, converted_file):
-                    transcribe_file = converted_file
-                else:
-                    transcribe_file = original_file
-            else:
-                transcribe_file = original_file
-            
-            # Check file size (Google Cloud has 10MB limit for direct content)
-            file_size = os.path.getsize(transcribe_file)
-            max_content_size = 10 * 1024 * 1024  # 10MB
+            transcribe_file = original_file
+            # Converted WAV is kept in memory and uploaded/sent from there (no temp file round trip)
+            converted_audio = None
             
             # Determine which method to use based on duration and file size
-            use_long_running = False
             duration = audio_file.duration or 0
             
             # If duration is missing or seems inaccurate, try to get it
             if not duration or duration <= 0:
                 logger.info("Duration missing or invalid, attempting to detect duration")
-                if PYDUB_AVAILABLE:
-                    try:
-                        audio_segment = AudioSegment.from_file(transcribe_file)
-                        duration = len(audio_segment) / 1000.0  # Convert to seconds
-                        logger.info(f"Detected duration using pydub: {duration}s")
-                    except Exception as e:
-                        logger.warning(f"Could not detect duration with pydub: {e}")
-                        # Estimate based on file size (very rough)
-                        duration = self.estimate_duration_from_file_size(transcribe_file, audio_file.format)
+                try:
+                    duration = probe_duration(original_file)
+                    logger.info(f"Detected duration using ffprobe: {duration}s")
+                except (OSError, subprocess.SubprocessError, ValueError) as e:
+                    logger.warning(f"Could not detect duration with ffprobe: {e}")
+                    # Estimate based on file size (very rough)
+                    duration = self.estimate_duration_from_file_size(
+                        original_file, audio_file.format, file_size=original_size
+                    ) or 0
                         
+            if (
+                duration > SEGMENTED_TRANSCRIPTION_MIN_SECONDS
+                and PYDUB_AVAILABLE
+                and TRANSCRIBE_MAX_PARALLEL_SEGMENTS > 0
+            ):
+                # Segments are sliced from the original file by ffmpeg, so skip the in-memory conversion
+                logger.info(f"Using parallel segmented recognize for audio duration: {duration}s")
+                result_data = self.transcribe_segments(original_file, duration, language_code)
+                logger.info(f"Transcription completed for audio file ID: {audio_file.id}")
+                return result_data
+
+            # Convert audio if needed (for better recognition); WAV that is already
+            # 16kHz mono PCM is sent as-is instead of being decoded and re-encoded
+            audio_format = audio_file.format.lower()
+            if PYDUB_AVAILABLE and (
+                audio_format in ['mp3', 'm4a', 'aac']
+                or (audio_format == 'wav' and not self.is_transcription_ready(original_file))
+            ):
+                buffer = io.BytesIO()
+                if self.convert_audio_for_transcription(original_file, buffer):
+                    converted_audio = buffer
+                    transcribe_file = f"{original_file}_converted.wav"
+            
+            # Check file size (Google Cloud has 10MB limit for direct content)
+            if converted_audio is not None:
+                file_size = converted_audio.getbuffer().nbytes
+            else:
+                file_size = original_size
+            max_content_size = 10 * 1024 * 1024  # 10MB
+            use_long_running = False
+            
             if duration > 60:  # Longer than 1 minute
                 use_long_running = True
                 logger.info(f"Using long running recognize for audio duration: {duration}s")
@@ -338,21 +605,17 @@ class TranscriptService:
                 
                 try:
                     # Upload to GCS
-                    gcs_uri = self.upload_to_gcs(transcribe_file, gcs_filename)
-                    
-                    # Transcribe from GCS
-                    result = self.transcribe_long_audio_from_gcs(gcs_uri, language_code)
+                    if converted_audio is not None:
+                        converted_audio.seek(0)
+                        gcs_uri = self.upload_to_gcs(converted_audio, gcs_filename)
+                    else:
+                        gcs_uri = self.upload_to_gcs(original_file, gcs_filename)
                     
-                    # Clean up the GCS file after transcription
+                    # Transcribe from GCS; the uploaded object is removed whatever the outcome
                     try:
-                        bucket = self.storage_client.bucket(self.gcs_bucket_name)
-                        blob = bucket.blob(gcs_filename)
-                        blob.delete()
-                        logger.info(f"Cleaned up GCS file: {gcs_uri}")
-                    except Exception as cleanup_error:
-                        logger.warning(f"Failed to cleanup GCS file {gcs_uri}: {cleanup_error}")
-                    
-                    return result
+                        return self.transcribe_long_audio_from_gcs(gcs_uri, language_code)
+                    finally:
+                        self.delete_from_gcs_later(gcs_filename)
                     
                 except Exception as gcs_error:
                     logger.error(f"GCS-based transcription failed: {gcs_error}")
@@ -380,14 +643,20 @@ class TranscriptService:
                     detail=CommonMessage.AUDIO_FILE_TOO_LARGE
                 )
             
-            # Read audio file
-            with open(transcribe_file, "rb") as audio_content:
-                content = audio_content.read()
+            # Read audio file; the request message copies the bytes, so the intermediate
+            # buffers are dropped right away to keep a single copy alive during the call
+            if converted_audio is not None:
+                content = converted_audio.getvalue()
+                converted_audio.close()
+                converted_audio = None
+            else:
+                with open(original_file, "rb") as audio_content:
+                    content = audio_content.read()
             
             # Configure recognition
             audio = speech.RecognitionAudio(content=content)
-            config = self.get_audio_config(transcribe_file)
-            config.language_code = language_code
+            del content
+            config = self.get_audio_config(transcribe_file, language_code)
             
             # Perform transcription
             logger.info(f"Starting transcription for audio file ID: {audio_file.id}, method: {'long_running' if use_long_running else 'synchronous'}")
@@ -411,15 +680,7 @@ class TranscriptService:
                 transcriptions.append({
                     "transcript": alternative.transcript,
                     "confidence": alternative.confidence,
-                    "words": [
-                        {
-                            "word": word_info.word,
-                            "start_time": word_info.start_time.total_seconds(),
-                            "end_time": word_info.end_time.total_seconds(),
-                            "confidence": word_info.confidence
-                        }
-                        for word_info in alternative.words
-                    ] if hasattr(alternative, 'words') else []
+                    "words": _word_timings(alternative)
                 })
                 overall_confidence += alternative.confidence
             
@@ -428,21 +689,15 @@ class TranscriptService:
                 overall_confidence /= len(transcriptions)
             
             # Combine all transcripts
-            full_transcript = " ".join([t["transcript"] for t in transcriptions])
-            
-            # Clean up converted file
-            if converted_file and os.path.exists(converted_file):
-                try:
-                    os.remove(converted_file)
-                except:
-                    pass
+            full_transcript = " ".join(t["transcript"] for t in transcriptions)
+            word_count = sum(len(t["transcript"].split()) for t in transcriptions)
             
             result_data = {
                 "transcript": full_transcript,
                 "confidence": overall_confidence,
                 "language_code": language_code,
                 "segments": transcriptions,
-                "word_count": len(full_transcript.split()) if full_transcript else 0,
+                "word_count": word_count,
                 "duration_transcribed": audio_file.duration,
                 "status": "completed"
             }
@@ -489,6 +744,17 @@ class TranscriptService:
                 code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    async def atranscribe_audio(
+        self,
+        audio_file: AudioFile,
+        language_code: str = "en-US"
+    ) -> ResponseCommon:
+        """
+        transcribe_audio on a worker thread, for async callers. Conversion, GCS upload and
+        waiting on the Speech operation are all blocking and would otherwise stall the event loop.
+        """
+        return await asyncio.to_thread(self.transcribe_audio, audio_file, language_code)
+
     def update_audio_file_transcription(
         self, 
         db: Session, 
@@ -503,8 +769,9 @@ class TranscriptService:
             audio_file.confidence_score = transcription_result["confidence"]
             audio_file.status = transcription_result["status"]
             
+            # No refresh: every column written here is already on the instance, so the
+            # worker (expire_on_commit=False) skips a SELECT and API sessions reload lazily
             db.commit()
-            db.refresh(audio_file)
             
             logger.info("Updated audio file %s with transcription", audio_file.id)
             return ResponseCommon.success_response(
@@ -520,20 +787,10 @@ class TranscriptService:
                 code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def get_supported_languages(self) -> list:
+    @staticmethod
+    def get_supported_languages() -> list:
         """Get list of supported languages"""
-        return [
-            {"code": "en-US", "name": "English (US)"},
-            {"code": "en-GB", "name": "English (UK)"},
-            {"code": "vi-VN", "name": "Vietnamese"},
-            {"code": "es-ES", "name": "Spanish"},
-            {"code": "fr-FR", "name": "French"},
-            {"code": "de-DE", "name": "German"},
-            {"code": "ja-JP", "name": "Japanese"},
-            {"code": "ko-KR", "name": "Korean"},
-            {"code": "zh-CN", "name": "Chinese (Simplified)"},
-            {"code": "pt-BR", "name": "Portuguese (Brazil)"},
-        ]
+        return list(SUPPORTED_LANGUAGES)
 
 # Global instance
 transcript_service = TranscriptService()
@@ -1,10 +1,17 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
 import socketio
 from urllib.parse import parse_qs
 from jose import jwt, JWTError
 
 from app.core.redis_config import REDIS_SETTINGS
 from app.config import settings
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, SocketSessionLocal
 from app.models.chatbot_model import ChatbotSession
 from app.services.auth_service import get_user_by_email
 from app.services.chatbot_service import chatbot_service
@@ -14,6 +21,12 @@ redis_url = f"redis://{REDIS_SETTINGS.host}:{REDIS_SETTINGS.port}/{REDIS_SETTING
 mgr = socketio.AsyncRedisManager(redis_url)
 sio = socketio.AsyncServer(async_mode="asgi", client_manager=mgr, cors_allowed_origins="*")
 
+# Validated tokens -> (user_id, expires_at); reconnects within the TTL skip decode + user lookup
+SOCKET_TOKEN_CACHE_SIZE = 10_000
+SOCKET_TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 
 def _get_token_from_environ(environ) -> str:
     query_string = environ.get("QUERY_STRING", "")
@@ -24,25 +37,52 @@ def _get_token_from_environ(environ) -> str:
             return token_list[0]
 
     auth_header = environ.get("HTTP_AUTHORIZATION")
-    if auth_header and auth_header.lower().startswith("bearer "):
-        return auth_header.split(" ", 1)[1]
+    if auth_header and auth_header[:7].lower() == "bearer ":
+        return auth_header[7:]
 
-    headers = environ.get("headers") or []
-    for key, value in headers:
-        header_name = key.decode("utf-8").lower()
-        if header_name == "authorization":
-            header_value = value.decode("utf-8")
-            if header_value.lower().startswith("bearer "):
-                return header_value.split(" ", 1)[1]
+    # ASGI header names are already lowercase bytes; only the matching value is decoded
+    for key, value in environ.get("headers") or ():
+        if key == b"authorization":
+            if value[:7].lower() == b"bearer ":
+                return value[7:].decode("latin-1")
+            break
 
     return ""
 
 
-def _authenticate_socket_user(environ):
+def _get_cached_user_id(token_key: bytes) -> Optional[int]:
+    with _token_cache_lock:
+        entry = _token_cache.get(token_key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del _token_cache[token_key]
+            return None
+        return user_id
+
+
+def _cache_user_id(token_key: bytes, user_id: int, token_exp) -> None:
+    expires_at = time.time() + SOCKET_TOKEN_CACHE_TTL_SECONDS
+    if isinstance(token_exp, (int, float)):
+        expires_at = min(expires_at, token_exp)
+    with _token_cache_lock:
+        _token_cache[token_key] = (user_id, expires_at)
+        _token_cache.move_to_end(token_key)
+        while len(_token_cache) > SOCKET_TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
+def _authenticate_socket_user(environ) -> Optional[int]:
     token = _get_token_from_environ(environ)
     if not token:
         return None
 
+    token_key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    user_id = _get_cached_user_id(token_key)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
         email = payload.get("sub")
@@ -51,19 +91,42 @@ def _authenticate_socket_user(environ):
     except JWTError:
         return None
 
-    db = SessionLocal()
+    db = SocketSessionLocal()
     try:
-        return get_user_by_email(db, email=email)
+        user = get_user_by_email(db, email=email)
+    finally:
+        db.close()
+    if not user:
+        return None
+
+    _cache_user_id(token_key, user.id, payload.get("exp"))
+    return user.id
+
+
+def _session_exists(session_id: str, user_id: int) -> bool:
+    db = SocketSessionLocal()
+    try:
+        session = (
+            db.query(ChatbotSession.id)
+            .filter(
+                ChatbotSession.session_id == session_id,
+                ChatbotSession.user_id == user_id,
+                ChatbotSession.is_active == True,
+            )
+            .first()
+        )
+        return session is not None
     finally:
         db.close()
 
 
 @sio.event
 async def connect(sid, environ):
-    user = _authenticate_socket_user(environ)
-    if not user:
+    # Token decode + user lookup use a sync DB session; keep them off the event loop
+    user_id = await asyncio.to_thread(_authenticate_socket_user, environ)
+    if not user_id:
         return False
-    await sio.save_session(sid, {"user_id": user.id})
+    await sio.save_session(sid, {"user_id": user_id})
 
 
 @sio.event
@@ -79,22 +142,9 @@ async def join_session(sid, data):
         await sio.emit("error", {"code": 401, "msg": "Unauthorized"}, room=sid)
         return
 
-    db = SessionLocal()
-    try:
-        session = (
-            db.query(ChatbotSession)
-            .filter(
-                ChatbotSession.session_id == session_id,
-                ChatbotSession.user_id == user_id,
-                ChatbotSession.is_active == True,
-            )
-            .first()
-        )
-        if not session:
-            await sio.emit("error", {"code": 404, "msg": "Session not found"}, room=sid)
-            return
-    finally:
-        db.close()
+    if not await asyncio.to_thread(_session_exists, session_id, user_id):
+        await sio.emit("error", {"code": 404, "msg": "Session not found"}, room=sid)
+        return
 
     await sio.enter_room(sid, session_id)
     await sio.emit("room_joined", {"session_id": session_id}, room=sid)
@@ -1,21 +1,217 @@
+import asyncio
+import functools
 import json
 import logging
+import os
+import queue
+import socket
+import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
-from sqlalchemy.orm import Session
+import redis
+from arq import cron
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.orm import Session, defer
 
+from app.common.constants import CacheKeys
+from app.core.firebase_config import warm_firebase_token
 from app.core.redis_config import REDIS_SETTINGS
-from app.db.session import SessionLocal
+from app.db.session import WorkerSessionLocal, worker_engine
 from app.models import AudioFile
 from app.models.task_job_model import TaskJob
+from app.services.chatbot_service import chatbot_service
+from app.services.note_service import summarize_audio_transcript
+from app.services.notification_service import NotificationService
+from app.services.task_job_service import task_job_service
+from app.services.transcript_service import transcript_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("arq.worker")
 
+# Short jobs (chatbot replies) report no "processing" state at all unless this is set;
+# clients treat queued and processing alike and get the outcome over socket/push anyway
+EMIT_PROCESSING_STATE = os.getenv("WORKER_EMIT_PROCESSING_STATE", "0") == "1"
 
+JOB_TIMEOUT_SECONDS = 3600
+# Upload jobs pushed to CacheKeys.PENDING_AUDIO_UPLOADS are completed this many at a time
+AUDIO_UPLOAD_BATCH_SIZE = 100
+# Names this worker's list of claimed uploads; must survive restarts so startup can requeue them
+WORKER_ID = os.getenv("WORKER_ID") or socket.gethostname()
+
+
+# Session work below runs via asyncio.to_thread so concurrent jobs (max_jobs) aren't
+# serialized behind blocking DB round trips on the worker's event loop
+def _get_job(db: Session, job_id: str) -> Optional[TaskJob]:
+    return db.get(TaskJob, job_id)
+
+
+def _get_audio_file(db: Session, audio_id: int, user_id: int) -> Optional[AudioFile]:
+    # Primary-key load (identity map first, cached statement otherwise), then the ownership check.
+    # Handlers only write the transcript, so the (possibly large) stored one isn't fetched;
+    # nothing downstream touches the relationships either, so none are eager-loaded
+    audio_file = db.get(AudioFile, audio_id, options=[defer(AudioFile.transcription)])
+    if audio_file is None or audio_file.user_id != user_id:
+        return None
+    return audio_file
+
+
+def _has_transcription(db: Session, audio_id: int) -> bool:
+    # Checked in SQL: reading the deferred column would fetch the whole transcript
+    return bool(db.scalar(
+        select(func.coalesce(func.length(AudioFile.transcription), 0) > 0).where(AudioFile.id == audio_id)
+    ))
+
+
+def _mark_failed(
+    db: Session,
+    job_id: str,
+    error_message: str,
+    audio_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Roll back the failed work, then mark the job (and its audio file, if given) failed in
+    one transaction. Returns the audio file's original name, or None if it wasn't found.
+    """
+    db.rollback()
+    db.execute(
+        update(TaskJob)
+        .where(TaskJob.id == job_id)
+        .values(status="failed", error_message=error_message)
+    )
+    original_filename = None
+    if audio_id is not None:
+        original_filename = db.execute(
+            update(AudioFile)
+            .where(AudioFile.id == audio_id, AudioFile.user_id == user_id)
+            .values(status="failed")
+            .returning(AudioFile.original_filename)
+        ).scalar_one_or_none()
+    db.commit()
+    return original_filename
+
+
+async def _set_inflight_status(ctx, job_id: str, status: str) -> None:
+    # In-flight state of short jobs lives in Redis only (read by get_job_status), sparing the
+    # row a commit; expiring with the job timeout means a dead worker's "processing" disappears.
+    # Long jobs commit "processing" to task_jobs instead, which stuck-job cleanup relies on
+    key = CacheKeys.TASK_JOB_STATUS.format(job_id=job_id)
+    try:
+        async with ctx["redis"].pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={"status": status, "updated_at": int(time.time())})
+            pipe.expire(key, JOB_TIMEOUT_SECONDS)
+            await pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Failed to publish %s status for job %s: %s", status, job_id, str(exc))
+
+
+def _run_id(ctx) -> Optional[str]:
+    # Dedup-keyed task_jobs reuse their id on every re-run, so the id alone doesn't identify an
+    # attempt; each re-run is enqueued anew, while arq retries of one attempt keep enqueue_time
+    job_id = ctx.get("job_id")
+    enqueue_time = ctx.get("enqueue_time")
+    if job_id is None or enqueue_time is None:
+        return job_id
+    return f"{job_id}:{int(enqueue_time.timestamp() * 1000)}"
+
+
+async def _enqueue_notification(ctx, **notification) -> None:
+    # Pushes go out from their own job so a slow FCM round trip doesn't hold this job's slot.
+    # Keyed by the attempt, so a re-run's notification isn't deduped against the previous run's
+    await ctx["redis"].enqueue_job("handle_notification", run_id=_run_id(ctx), **notification)
+
+
+async def handle_notification(
+    ctx,
+    user_id: int,
+    title: str,
+    body: str,
+    notification_type: str,
+    related_id: Optional[int] = None,
+    data: Optional[dict] = None,
+    run_id: Optional[str] = None,
+):
+    """
+    Background task for storing a notification and sending its push.
+    """
+    db: Session = WorkerSessionLocal()
+    try:
+        await NotificationService.send_and_store_notification(
+            db=db,
+            user_id=user_id,
+            title=title,
+            body=body,
+            notification_type=notification_type,
+            related_id=related_id,
+            data=data,
+            run_id=run_id,
+        )
+    except Exception as exc:
+        logger.error("Error sending %s notification to user %s: %s", notification_type, user_id, str(exc))
+    finally:
+        db.close()
+
+
+def task_job(description: str, on_failure=None, fail_audio_file: bool = False):
+    """
+    Run an arq handler inside the shared TaskJob lifecycle.
+
+    The wrapper opens a worker session and loads the job row, then calls the body as
+    body(ctx, db, job_record, **kwargs); the body owns its success path and commits.
+    On any exception the job (and with fail_audio_file, the audio_id kwarg's file) is
+    marked failed in a single transaction, then on_failure(ctx, exc, audio_filename, **kwargs)
+    runs for side effects such as notifications.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(ctx, job_id: str, **kwargs):
+            db: Session = WorkerSessionLocal()
+            try:
+                logger.info("Starting %s for job: %s", description, job_id)
+
+                job_record = await asyncio.to_thread(_get_job, db, job_id)
+                if not job_record:
+                    logger.error("Job %s not found in database", job_id)
+                    return
+
+                await fn(ctx, db, job_record, **kwargs)
+
+                logger.info("Completed %s for job: %s", description, job_id)
+            except Exception as exc:
+                logger.error("Error processing %s job %s: %s", description, job_id, str(exc))
+                audio_filename = await asyncio.to_thread(
+                    _mark_failed,
+                    db,
+                    job_id,
+                    str(exc),
+                    kwargs.get("audio_id") if fail_audio_file else None,
+                    kwargs.get("user_id"),
+                )
+                if on_failure is not None:
+                    await on_failure(ctx, exc, audio_filename, **kwargs)
+            finally:
+                db.close()
+
+        return wrapper
+
+    return decorator
+
+
+def _audio_upload_result(file_info: dict) -> dict:
+    return {
+        "file_name": file_info.get("file_name"),
+        "file_path": file_info.get("file_path"),
+        "format": file_info.get("file_format") or file_info.get("format"),
+        "processed": True,
+    }
+
+
+@task_job("audio upload", fail_audio_file=True)
 async def handle_audio_upload(
     ctx,
-    job_id: str,
+    db: Session,
+    job_record: TaskJob,
     file_info: dict,
     user_id: int,
     audio_id: Optional[int] = None,
@@ -23,60 +219,46 @@ async def handle_audio_upload(
     """
     Background task for processing uploaded audio files.
     """
-    db: Session = SessionLocal()
-    job_record = None
     audio_file = None
-    try:
-        logger.info("Starting audio upload processing for job: %s", job_id)
-
-        job_record = db.query(TaskJob).filter(TaskJob.id == job_id).first()
-        if not job_record:
-            logger.error("Job %s not found in database", job_id)
-            return
-
-        if audio_id is not None:
-            audio_file = (
-                db.query(AudioFile)
-                .filter(AudioFile.id == audio_id, AudioFile.user_id == user_id)
-                .first()
-            )
-
-        job_record.status = "processing"
-        if audio_file:
-            audio_file.status = "processing"
-        db.commit()
-
-        result = {
-            "file_name": file_info.get("file_name"),
-            "file_path": file_info.get("file_path"),
-            "format": file_info.get("file_format") or file_info.get("format"),
-            "processed": True,
-        }
+    if audio_id is not None:
+        audio_file = await asyncio.to_thread(_get_audio_file, db, audio_id, user_id)
 
-        job_record.status = "completed"
-        job_record.result = json.dumps(result, ensure_ascii=False)
-        if audio_file:
-            audio_file.status = "completed"
-        db.commit()
+    # Building the result is instantaneous, so there is no separate "processing" commit
+    job_record.status = "completed"
+    job_record.result = _audio_upload_result(file_info)
+    if audio_file:
+        audio_file.status = "completed"
+    await asyncio.to_thread(db.commit)
 
-        logger.info("Completed audio upload processing for job: %s", job_id)
-    except Exception as exc:
-        logger.error("Error processing audio upload job %s: %s", job_id, str(exc))
-        db.rollback()
-        if job_record:
-            job_record.status = "failed"
-            job_record.error_message = str(exc)
-        if audio_file:
-            audio_file.status = "failed"
-        if job_record or audio_file:
-            db.commit()
-    finally:
-        db.close()
+
+async def _transcription_failed(
+    ctx, exc: Exception, audio_filename: Optional[str], audio_id: int, user_id: int, **_
+):
+    if audio_filename is None:
+        return
+    try:
+        await _enqueue_notification(
+            ctx,
+            user_id=user_id,
+            title="Transcription Failed ❌",
+            body=f"Failed to transcribe '{audio_filename}'",
+            notification_type="transcription_failed",
+            related_id=audio_id,
+            data={
+                "type": "transcription_failed",
+                "audio_id": str(audio_id),
+                "status": "failed",
+            },
+        )
+    except Exception as notify_exc:
+        logger.error("Failed to queue transcription failure notification: %s", notify_exc)
 
 
+@task_job("transcription", on_failure=_transcription_failed, fail_audio_file=True)
 async def handle_transcription(
     ctx,
-    job_id: str,
+    db: Session,
+    job_record: TaskJob,
     audio_id: int,
     language_code: str,
     user_id: int,
@@ -84,237 +266,311 @@ async def handle_transcription(
     """
     Background task for transcribing audio files.
     """
-    db: Session = SessionLocal()
-    job_record = None
-    audio_file = None
-    try:
-        logger.info("Starting transcription for job: %s, audio_id: %s", job_id, audio_id)
+    audio_file = await asyncio.to_thread(_get_audio_file, db, audio_id, user_id)
+    if not audio_file:
+        raise Exception(f"Audio file not found: {audio_id}")
 
-        job_record = db.query(TaskJob).filter(TaskJob.id == job_id).first()
-        if not job_record:
-            logger.error("Job %s not found in database", job_id)
-            return
+    # Status first: only an already-completed file is checked for a stored transcript
+    if audio_file.status == "completed" and await asyncio.to_thread(_has_transcription, db, audio_id):
+        job_record.status = "completed"
+        job_record.result = {"audio_id": audio_id, "confidence": audio_file.confidence_score}
+        await asyncio.to_thread(db.commit)
+        logger.info("Transcription already completed for audio_id: %s", audio_id)
+        return
+
+    job_record.status = "processing"
+    audio_file.status = "processing"
+    await asyncio.to_thread(db.commit)
+
+    transcription_response = await transcript_service.atranscribe_audio(
+        audio_file=audio_file,
+        language_code=language_code,
+    )
+    if not transcription_response.success:
+        raise Exception(transcription_response.message)
+
+    # The job's completion rides on the audio file update's commit (one transaction);
+    # if that update fails it is rolled back along with it
+    # The transcript itself lives on the audio file only; copying it into the job row
+    # doubled the largest write of the job
+    job_record.status = "completed"
+    transcription_data = transcription_response.data or {}
+    job_record.result = {
+        "audio_id": audio_id,
+        "confidence": transcription_data.get("confidence"),
+        "word_count": transcription_data.get("word_count"),
+    }
+    update_response = await asyncio.to_thread(
+        transcript_service.update_audio_file_transcription,
+        db=db,
+        audio_file=audio_file,
+        transcription_result=transcription_data,
+    )
+    if not update_response.success:
+        raise Exception(update_response.message)
 
-        audio_file = (
-            db.query(AudioFile)
-            .filter(AudioFile.id == audio_id, AudioFile.user_id == user_id)
-            .first()
+    try:
+        await _enqueue_notification(
+            ctx,
+            user_id=user_id,
+            title="Transcription Complete ✅",
+            body=f"Your audio '{audio_file.original_filename}' has been transcribed successfully",
+            notification_type="transcription_complete",
+            related_id=audio_id,
+            data={
+                "type": "transcription_complete",
+                "audio_id": str(audio_id),
+                "status": "completed",
+            },
         )
-        if not audio_file:
-            raise Exception(f"Audio file not found: {audio_id}")
-
-        if audio_file.transcription and audio_file.status == "completed":
-            job_record.status = "completed"
-            job_record.result = audio_file.transcription
-            db.commit()
-            logger.info("Transcription already completed for audio_id: %s", audio_id)
-            return
-
-        job_record.status = "processing"
-        audio_file.status = "processing"
-        db.commit()
+    except Exception as notify_exc:
+        logger.error("Failed to queue transcription notification: %s", notify_exc)
 
-        from app.services.transcript_service import transcript_service
 
-        transcription_response = transcript_service.transcribe_audio(
-            audio_file=audio_file,
-            language_code=language_code,
-        )
-        if not transcription_response.success:
-            raise Exception(transcription_response.message)
-
-        update_response = transcript_service.update_audio_file_transcription(
-            db=db,
-            audio_file=audio_file,
-            transcription_result=transcription_response.data or {},
+async def _summarization_failed(
+    ctx, exc: Exception, audio_filename: Optional[str], audio_id: int, user_id: int, **_
+):
+    try:
+        await _enqueue_notification(
+            ctx,
+            user_id=user_id,
+            title="Summarization Failed ❌",
+            body="Failed to summarize your note",
+            notification_type="summarization_failed",
+            related_id=audio_id,
+            data={
+                "type": "summarization_failed",
+                "audio_id": str(audio_id),
+                "status": "failed",
+            },
         )
-        if not update_response.success:
-            raise Exception(update_response.message)
+    except Exception as notify_exc:
+        logger.error("Failed to queue summarization failure notification: %s", notify_exc)
 
-        job_record.status = "completed"
-        if transcription_response.data:
-            job_record.result = transcription_response.data.get("transcript")
-        db.commit()
 
-        try:
-            from app.services.notification_service import NotificationService
-
-            await NotificationService.send_and_store_notification(
-                db=db,
-                user_id=user_id,
-                title="Transcription Complete ✅",
-                body=f"Your audio '{audio_file.original_filename}' has been transcribed successfully",
-                notification_type="transcription_complete",
-                related_id=audio_id,
-                data={
-                    "type": "transcription_complete",
-                    "audio_id": str(audio_id),
-                    "status": "completed",
-                },
-            )
-        except Exception as notify_exc:
-            logger.error("Failed to send transcription notification: %s", notify_exc)
-
-        logger.info("Completed transcription for job: %s", job_id)
-    except Exception as exc:
-        logger.error("Error processing transcription job %s: %s", job_id, str(exc))
-        db.rollback()
-        if job_record:
-            job_record.status = "failed"
-            job_record.error_message = str(exc)
-        if audio_file:
-            audio_file.status = "failed"
-        if job_record or audio_file:
-            db.commit()
-        if audio_file:
-            try:
-                from app.services.notification_service import NotificationService
-
-                await NotificationService.send_and_store_notification(
-                    db=db,
-                    user_id=user_id,
-                    title="Transcription Failed ❌",
-                    body=f"Failed to transcribe '{audio_file.original_filename}'",
-                    notification_type="transcription_failed",
-                    related_id=audio_id,
-                    data={
-                        "type": "transcription_failed",
-                        "audio_id": str(audio_id),
-                        "status": "failed",
-                    },
-                )
-            except Exception as notify_exc:
-                logger.error("Failed to send transcription failure notification: %s", notify_exc)
-    finally:
-        db.close()
+async def _notify_summary_ready(ctx, user_id: int, audio_id: int, note_id: Optional[int]) -> None:
+    try:
+        await _enqueue_notification(
+            ctx,
+            user_id=user_id,
+            title="Summary Ready 📝",
+            body="Your note has been summarized",
+            notification_type="summarization_complete",
+            related_id=note_id,
+            data={
+                "type": "summarization_complete",
+                "audio_id": str(audio_id),
+                "note_id": str(note_id) if note_id else "",
+                "status": "completed",
+            },
+        )
+    except Exception as notify_exc:
+        logger.error("Failed to queue summarization notification: %s", notify_exc)
 
 
-async def handle_summarization(ctx, job_id: str, audio_id: int, user_id: int):
+@task_job("summarization", on_failure=_summarization_failed)
+async def handle_summarization(ctx, db: Session, job_record: TaskJob, audio_id: int, user_id: int):
     """
     Background task for summarizing transcripts.
     """
-    db: Session = SessionLocal()
-    job_record = None
-    try:
-        logger.info("Starting summarization for job: %s, audio_id: %s", job_id, audio_id)
+    # Committed, not only published to Redis: a long run killed by job_timeout or a worker
+    # crash must stay "processing" so fail_stuck_jobs can fail it, and task search and the
+    # summarize dedup_key both read the row
+    job_record.status = "processing"
+    await asyncio.to_thread(db.commit)
+
+    summary_response = await summarize_audio_transcript(
+        db=db,
+        audio_file_id=audio_id,
+        user_id=user_id,
+    )
+    if not summary_response.success:
+        raise Exception(summary_response.message)
+
+    note_id = summary_response.data.get("note_id") if summary_response.data else None
+    job_record.status = "completed"
+    job_record.result = summary_response.data
+    await asyncio.to_thread(db.commit)
+
+    # Only after the commit: a failed commit goes to the failure path, which sends its own push
+    await _notify_summary_ready(ctx, user_id, audio_id, note_id)
+
+
+@task_job("chatbot message")
+async def handle_chatbot_message(
+    ctx,
+    db: Session,
+    job_record: TaskJob,
+    session_id: str,
+    message: str,
+    user_id: int,
+):
+    """Background task for processing chatbot messages."""
+    if EMIT_PROCESSING_STATE:
+        await _set_inflight_status(ctx, job_record.id, "processing")
+
+    result = await chatbot_service.process_message(
+        db=db,
+        user_id=user_id,
+        session_id=session_id,
+        message=message,
+    )
+
+    job_record.status = "completed"
+    job_record.result = result
+    await asyncio.to_thread(db.commit)
+
+
+def _upload_audio_keys(uploads: list) -> list:
+    # (audio_id, user_id) pairs: like _get_audio_file, only the uploading user's file is touched
+    return [
+        (upload["audio_id"], upload["user_id"])
+        for upload in uploads
+        if upload.get("audio_id") is not None
+    ]
 
-        job_record = db.query(TaskJob).filter(TaskJob.id == job_id).first()
-        if not job_record:
-            logger.error("Job %s not found in database", job_id)
-            return
 
-        job_record.status = "processing"
-        db.commit()
+def _complete_audio_uploads(db: Session, uploads: list) -> None:
+    # One executemany UPDATE for the job rows and one UPDATE ... IN for the audio files
+    db.execute(
+        update(TaskJob),
+        [
+            {
+                "id": upload["job_id"],
+                "status": "completed",
+                "result": _audio_upload_result(upload["file_info"]),
+            }
+            for upload in uploads
+        ],
+    )
+    audio_keys = _upload_audio_keys(uploads)
+    if audio_keys:
+        db.execute(
+            update(AudioFile)
+            .where(tuple_(AudioFile.id, AudioFile.user_id).in_(audio_keys))
+            .values(status="completed")
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+
+def _fail_audio_uploads(db: Session, uploads: list, error_message: str) -> None:
+    db.rollback()
+    db.execute(
+        update(TaskJob)
+        .where(TaskJob.id.in_([upload["job_id"] for upload in uploads]))
+        .values(status="failed", error_message=error_message)
+        .execution_options(synchronize_session=False)
+    )
+    audio_keys = _upload_audio_keys(uploads)
+    if audio_keys:
+        db.execute(
+            update(AudioFile)
+            .where(tuple_(AudioFile.id, AudioFile.user_id).in_(audio_keys))
+            .values(status="failed")
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
 
-        from app.services.note_service import summarize_audio_transcript
 
-        summary_response = summarize_audio_transcript(
-            db=db,
-            audio_file_id=audio_id,
-            user_id=user_id,
-        )
-        if not summary_response.success:
-            raise Exception(summary_response.message)
+async def _claim_audio_uploads(redis_pool) -> list:
+    # LMOVE rather than LPOP: claimed entries stay in this worker's processing list until
+    # their rows are committed, so a kill in between doesn't lose them
+    processing_key = CacheKeys.PROCESSING_AUDIO_UPLOADS.format(worker_id=WORKER_ID)
+    async with redis_pool.pipeline(transaction=False) as pipe:
+        for _ in range(AUDIO_UPLOAD_BATCH_SIZE):
+            pipe.lmove(CacheKeys.PENDING_AUDIO_UPLOADS, processing_key, "LEFT", "RIGHT")
+        items = await pipe.execute()
+    return [item for item in items if item is not None]
 
-        job_record.status = "completed"
-        job_record.result = json.dumps(summary_response.data, ensure_ascii=False)
-        db.commit()
 
+async def _release_audio_uploads(redis_pool, items: list) -> None:
+    processing_key = CacheKeys.PROCESSING_AUDIO_UPLOADS.format(worker_id=WORKER_ID)
+    async with redis_pool.pipeline(transaction=False) as pipe:
+        for item in items:
+            pipe.lrem(processing_key, 1, item)
+        await pipe.execute()
+
+
+async def _requeue_claimed_audio_uploads(redis_pool) -> None:
+    # Entries a previous run of this worker claimed but never committed; completing an
+    # upload twice is harmless, so they simply go back to the front of the pending list
+    processing_key = CacheKeys.PROCESSING_AUDIO_UPLOADS.format(worker_id=WORKER_ID)
+    requeued = 0
+    while await redis_pool.lmove(processing_key, CacheKeys.PENDING_AUDIO_UPLOADS, "RIGHT", "LEFT"):
+        requeued += 1
+    if requeued:
+        logger.warning("Requeued %d audio uploads claimed before the last shutdown", requeued)
+
+
+async def drain_audio_uploads(ctx):
+    """
+    Cron task completing queued audio uploads in batches (see create_and_queue_job's batch_queue).
+    """
+    items = await _claim_audio_uploads(ctx["redis"])
+    if not items:
+        return
+
+    uploads = [json.loads(item) for item in items]
+    db: Session = WorkerSessionLocal()
+    try:
         try:
-            from app.services.notification_service import NotificationService
-
-            note_id = summary_response.data.get("note_id") if summary_response.data else None
-            await NotificationService.send_and_store_notification(
-                db=db,
-                user_id=user_id,
-                title="Summary Ready 📝",
-                body="Your note has been summarized",
-                notification_type="summarization_complete",
-                related_id=note_id,
-                data={
-                    "type": "summarization_complete",
-                    "audio_id": str(audio_id),
-                    "note_id": str(note_id) if note_id else "",
-                    "status": "completed",
-                },
-            )
-        except Exception as notify_exc:
-            logger.error("Failed to send summarization notification: %s", notify_exc)
-
-        logger.info("Completed summarization for job: %s", job_id)
-    except Exception as exc:
-        logger.error("Error processing summarization job %s: %s", job_id, str(exc))
-        db.rollback()
-        if job_record:
-            job_record.status = "failed"
-            job_record.error_message = str(exc)
-            db.commit()
-        try:
-            from app.services.notification_service import NotificationService
-
-            await NotificationService.send_and_store_notification(
-                db=db,
-                user_id=user_id,
-                title="Summarization Failed ❌",
-                body="Failed to summarize your note",
-                notification_type="summarization_failed",
-                related_id=audio_id,
-                data={
-                    "type": "summarization_failed",
-                    "audio_id": str(audio_id),
-                    "status": "failed",
-                },
-            )
-        except Exception as notify_exc:
-            logger.error("Failed to send summarization failure notification: %s", notify_exc)
+            await asyncio.to_thread(_complete_audio_uploads, db, uploads)
+            logger.info("Completed %d batched audio uploads", len(uploads))
+        except Exception as exc:
+            logger.error("Error completing %d batched audio uploads: %s", len(uploads), str(exc))
+            await asyncio.to_thread(_fail_audio_uploads, db, uploads, str(exc))
+        # Only once the outcome is committed; if marking them failed raised too, the entries
+        # stay claimed for the next startup (or stuck-job cleanup) to deal with
+        await _release_audio_uploads(ctx["redis"], items)
     finally:
         db.close()
 
 
-async def handle_chatbot_message(
-    ctx,
-    job_id: str,
-    session_id: str,
-    message: str,
-    user_id: int,
-):
-    """Background task for processing chatbot messages."""
-    db: Session = SessionLocal()
-    job_record = None
+async def cleanup_stuck_jobs(ctx):
+    """
+    Cron task failing jobs whose worker died mid-run or whose queued arq job was lost,
+    on this worker's warm connection pool.
+    """
+    db: Session = WorkerSessionLocal()
     try:
-        logger.info("Starting chatbot processing for job: %s", job_id)
+        count = await asyncio.to_thread(task_job_service.fail_stuck_jobs, db)
+        if count:
+            logger.warning("Marked %d stuck jobs as failed", count)
+    finally:
+        db.close()
 
-        job_record = db.query(TaskJob).filter(TaskJob.id == job_id).first()
-        if not job_record:
-            logger.error("Job %s not found in database", job_id)
-            return
 
-        job_record.status = "processing"
-        db.commit()
+_log_listeners = []
 
-        from app.services.chatbot_service import chatbot_service
 
-        result = await chatbot_service.process_message(
-            db=db,
-            user_id=user_id,
-            session_id=session_id,
-            message=message,
-        )
+def _queue_log_handlers(target: logging.Logger) -> None:
+    # Handlers set up so far (basicConfig, arq's CLI logging config) move to a listener
+    # thread; the event loop only enqueues records and never blocks on a slow stderr pipe
+    handlers = target.handlers[:]
+    if not handlers:
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        target.removeHandler(handler)
+    target.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _log_listeners.append(listener)
 
-        job_record.status = "completed"
-        job_record.result = json.dumps(result, ensure_ascii=False)
-        db.commit()
 
-        logger.info("Completed chatbot processing for job: %s", job_id)
-    except Exception as exc:
-        logger.error("Error processing chatbot job %s: %s", job_id, str(exc))
-        db.rollback()
-        if job_record:
-            job_record.status = "failed"
-            job_record.error_message = str(exc)
-            db.commit()
-    finally:
-        db.close()
+async def startup(ctx):
+    for target in (logging.getLogger(), logging.getLogger("arq")):
+        _queue_log_handlers(target)
+    await _requeue_claimed_audio_uploads(ctx["redis"])
+    # One Firebase app (messaging HTTP session + access token) serves every push this worker sends
+    await asyncio.to_thread(warm_firebase_token)
+
+
+async def shutdown(ctx):
+    worker_engine.dispose()
+    for listener in _log_listeners:
+        listener.stop()
 
 
 class WorkerSettings:
@@ -325,8 +581,21 @@ class WorkerSettings:
         handle_transcription,
         handle_summarization,
         handle_chatbot_message,
+        handle_notification,
+    ]
+    cron_jobs = [
+        # Every second; a lone upload waits at most that long to be completed
+        cron(drain_audio_uploads, second=set(range(60)), run_at_startup=True),
+        cron(cleanup_stuck_jobs, minute={0, 15, 30, 45}),
     ]
     redis_settings = REDIS_SETTINGS
-    max_jobs = 10
-    job_timeout = 3600
-    keep_result = 3600
+    on_startup = startup
+    on_shutdown = shutdown
+    # Keep WORKER_DB_POOL_SIZE + overflow at or above this so jobs never wait on the DB pool
+    max_jobs = int(os.getenv("WORKER_MAX_JOBS", "10"))
+    job_timeout = JOB_TIMEOUT_SECONDS
+    # Jobs are picked up within 100ms of being queued instead of arq's default 500ms poll
+    poll_delay = 0.1
+    # Status and results are read from task_jobs, never from arq; keep Redis results
+    # only briefly
+    keep_result = 60
@@ -1,26 +1,13 @@
-from datetime import datetime, timedelta, timezone
-
 from app.db.session import SessionLocal
-from app.models.task_job_model import TaskJob
+from app.services.task_job_service import task_job_service
 
 
+# The worker runs the same cleanup every 15 minutes (see WorkerSettings.cron_jobs);
+# this entrypoint remains for one-off runs
 def main() -> None:
     db = SessionLocal()
     try:
-        timeout = datetime.now(timezone.utc) - timedelta(hours=2)
-
-        stuck_jobs = (
-            db.query(TaskJob)
-            .filter(TaskJob.status == "processing", TaskJob.updated_at < timeout)
-            .all()
-        )
-
-        for job in stuck_jobs:
-            job.status = "failed"
-            job.error_message = "Job timeout - exceeded maximum processing time"
-
-        db.commit()
-        print(f"Cleaned up {len(stuck_jobs)} stuck jobs")
+        print(f"Cleaned up {task_job_service.fail_stuck_jobs(db)} stuck jobs")
     finally:
         db.close()
 